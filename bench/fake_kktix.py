@@ -0,0 +1,243 @@
+"""
+Local stand-in for KKTIX serving generated order histories
+"""
+
+import random
+import threading
+import time
+import uuid
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOSTS = ["Python Taiwan", "JSDC", "COSCUP", "Taipei.py", "Rust Taiwan", "AWS User Group", "GDG Taipei"]
+# Size of every served image, roughly a KKTIX event thumbnail
+IMAGE_BYTES = 48 * 1024
+LOCATIONS = ["台北市信義區", "台北市中正區", "新竹市東區", "台中市西屯區", "高雄市前鎮區", "Online"]
+
+def generate_orders(count, seed=0):
+    """Generate KKTIX-shaped orders, newest first"""
+    rng = random.Random(seed)
+    orders = []
+    for i in range(count):
+        day = count - i
+        start_hour = rng.choice([9, 13, 14, 19])
+        free = rng.random() < 0.2
+        orders.append({
+            "order_number": f"{100000000 + count - i}",
+            "event_slug": f"event-{i}",
+            "event_title": f"Synthetic Event #{count - i}",
+            "host": rng.choice(HOSTS),
+            "location": rng.choice(LOCATIONS),
+            "amount": None if free else rng.choice([100, 300, 500, 1200, 3600]),
+            "receipt": None if free else f"AB-{rng.randint(10000000, 99999999)}",
+            "date": f"20{15 + day // 365 % 10}/{day % 12 + 1:02d}/{day % 28 + 1:02d}",
+            "start": f"{start_hour:02d}:00",
+            "end": f"{start_hour + rng.choice([2, 3, 4]):02d}:00",
+            "details_enabled": rng.random() > 0.05
+        })
+    return orders
+
+def render_sign_in():
+    """Sign-in form with the fields login() fills in"""
+    return """<html><body>
+<form action="/users/sign_in" method="post">
+  <input id="user_login" name="user[login]" type="text">
+  <input id="user_password" name="user[password]" type="password">
+  <input name="commit" type="submit" value="Sign In">
+</form>
+</body></html>"""
+
+def render_row(order):
+    """One accounting-row as shown on the orders page"""
+    if order["amount"] is None:
+        price = '<span class="price">Free</span>'
+    else:
+        price = (
+            '<span class="price"><span class="currency">NT$</span>'
+            f'<span class="currency-value">{order["amount"]:,}</span></span>'
+        )
+    receipt = ""
+    if order["receipt"]:
+        receipt = f'<dt>Receipt</dt><dd><a href="/receipts/{order["receipt"]}">{order["receipt"]}</a></dd>'
+    disabled = "" if order["details_enabled"] else " disabled"
+    return f"""<div class="accounting-row">
+  <div class="col-thumb"><span class="subrow">#{order["order_number"]}</span>
+    <img class="thumb" src="/images/{order["event_slug"]}.png"></div>
+  <div class="event-title"><h4 class="subrow"><a href="/events/{order["event_slug"]}">{escape(order["event_title"])}</a></h4></div>
+  <dl class="item">
+    <dt>Event Host</dt><dd>{escape(order["host"])}</dd>
+    <dt>Event Location</dt><dd>{escape(order["location"])}</dd>
+    <dt>Ticket Types</dt><dd>General Admission</dd>
+    <dt>Tickets</dt><dd>1</dd>
+    <dt>Amount</dt><dd>{price}</dd>
+    <dt>State</dt><dd>Paid</dd>
+    {receipt}
+  </dl>
+  <div class="col-action">
+    <a class="btn" href="/events/{order["event_slug"]}/registrations/{order["order_number"]}"{disabled}>Check/Edit Details</a>
+    <a class="btn" href="/events/{order["event_slug"]}">Event Page</a>
+  </div>
+</div>"""
+
+def render_orders_page(orders, page, page_size):
+    """Orders listing page with pagination"""
+    last_page = max(1, (len(orders) + page_size - 1) // page_size)
+    rows = orders[(page - 1) * page_size:page * page_size]
+    links = []
+    for number in sorted({1, page - 1, page, page + 1, last_page}):
+        if 1 <= number <= last_page:
+            links.append(f'<li><a href="/account/orders?page={number}">{number}</a></li>')
+    if page < last_page:
+        links.append(f'<li><a rel="next" href="/account/orders?page={page + 1}">Next &rsaquo;</a></li>')
+    return f"""<html><body><div class="orders">
+{"".join(render_row(order) for order in rows)}
+</div>
+<ul class="pagination">{"".join(links)}</ul>
+</body></html>"""
+
+def render_registration(order):
+    """Check/Edit Details page with the event time cell"""
+    return f"""<html><body>
+<div id="registrations_controller">
+  <div><div class="header"><img class="banner" src="/images/{order["event_slug"]}-banner.jpg">{escape(order["event_title"])}</div>
+    <div><div>
+      <div><div><table><tbody>
+        <tr><td>{order["date"]} {order["start"]}(+0800) ~ {order["end"]}(+0800) Add to Calendar</td></tr>
+        <tr><td>{escape(order["location"])}</td></tr>
+      </tbody></table></div></div>
+    </div></div>
+  </div>
+</div>
+</body></html>"""
+
+class FakeKKTIXHandler(BaseHTTPRequestHandler):
+    """Serve sign-in, order listing and registration pages for one fake account."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_image(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(IMAGE_BYTES))
+        self.end_headers()
+        self.wfile.write(b'\0' * IMAGE_BYTES)
+
+    def send_html(self, body, status=200, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def redirect(self, location, headers=None):
+        self.send_html("", status=302, headers={'Location': location, **(headers or {})})
+
+    def logged_in(self):
+        cookies = self.headers.get('Cookie', '')
+        return f"kktix_session={self.server.session_token}" in cookies
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+
+        # Simulate an overloaded KKTIX on order pages
+        if url.path.startswith(('/account/', '/events/')) and self.server.rng.random() < self.server.error_rate:
+            self.send_html("<html><body>Service Unavailable</body></html>", status=503)
+            return
+
+        if url.path == '/users/sign_in':
+            self.send_html(render_sign_in())
+        elif url.path.startswith('/images/'):
+            self.send_image()
+        elif url.path == '/account/orders':
+            if not self.logged_in():
+                self.redirect('/users/sign_in')
+                return
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+            if page in self.server.failing_pages:
+                self.send_html("<html><body>Not found</body></html>", status=404)
+                return
+            self.send_html(render_orders_page(self.server.orders, page, self.server.page_size))
+        elif len(parts) == 4 and parts[0] == 'events' and parts[2] == 'registrations':
+            if not self.logged_in():
+                self.redirect('/users/sign_in')
+                return
+            order = self.server.orders_by_number.get(parts[3])
+            if order is None:
+                self.send_html("<html><body>Not found</body></html>", status=404)
+            else:
+                self.send_html(render_registration(order))
+        else:
+            self.send_html("", status=404)
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        length = int(self.headers.get('Content-Length', '0'))
+        self.rfile.read(length)
+        if urlparse(self.path).path != '/users/sign_in':
+            self.send_html("", status=404)
+            return
+        self.redirect('/account/orders', headers={
+            'Set-Cookie': f"kktix_session={self.server.session_token}; Path=/; HttpOnly"
+        })
+
+class FakeKKTIXServer:
+    """Run FakeKKTIXHandler on a local port in a background thread."""
+    def __init__(self, order_count=100, page_size=20, latency=0.0, seed=0, port=0, error_rate=0.0, failing_pages=()):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), FakeKKTIXHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.orders = generate_orders(order_count, seed)
+        self.httpd.orders_by_number = {order["order_number"]: order for order in self.httpd.orders}
+        self.httpd.page_size = page_size
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        # Listing pages answered with 404 until removed from the set
+        self.httpd.failing_pages = set(failing_pages)
+        self.httpd.rng = random.Random(seed)
+        self.httpd.session_token = uuid.uuid4().hex
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a fake KKTIX account locally")
+    parser.add_argument('--orders', type=int, default=100)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of order pages answered with 503")
+    args = parser.parse_args()
+
+    with FakeKKTIXServer(args.orders, args.page_size, args.latency, port=args.port, error_rate=args.error_rate) as server:
+        print(f"Fake KKTIX serving {args.orders} orders at {server.url}")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
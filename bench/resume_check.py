@@ -0,0 +1,97 @@
+"""
+Crash-resume check against the fake KKTIX server
+
+Runs the browserless fetcher while one listing page answers 404, then
+fixes the page and resumes into the same dumps directory. The first run
+must leave an unfinished checkpoint before the failed page, and the
+resumed run must end with every order exactly once. Both the sequential
+and the prefetching pagination are checked. Requires requests, but not
+Chrome: the fetcher is given the fake server's session cookie directly.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fake_kktix import FakeKKTIXServer  # noqa: E402
+
+def fetch(server, dumps_dir):
+    """Run one fetch into dumps_dir and return (order_count, checkpoint, order numbers)"""
+    from http_fetcher import KKTIXHttpFetcher
+    from order_stream import CHECKPOINT_FILENAME
+
+    cookies = [{"name": "kktix_session", "value": server.httpd.session_token}]
+    fetcher = KKTIXHttpFetcher(cookies, root_url=server.url, dumps_dir=dumps_dir)
+    try:
+        order_count = fetcher.get_order_details()
+    finally:
+        fetcher.quit()
+
+    with open(os.path.join(dumps_dir, CHECKPOINT_FILENAME), 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    with open(os.path.join(dumps_dir, fetcher.latest_json_filename), 'r', encoding='utf-8') as f:
+        order_numbers = [order_info["order_number"] for order_info in json.load(f)]
+    return order_count, checkpoint, order_numbers
+
+def check(args, prefetch):
+    """Fail one page, resume after fixing it and return a list of problems"""
+    problems = []
+    with FakeKKTIXServer(args.orders, args.page_size, failing_pages=[args.fail_page]) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            'KKTIX_PREFETCH_PAGES': 'true' if prefetch else 'false',
+            'KKTIX_HTTP_WORKERS': str(args.workers),
+            'KKTIX_RATE_LIMIT': '0',
+            'KKTIX_STORE_PATH': os.path.join(workdir, 'orders_store.json'),
+            'KKTIX_DETAIL_CACHE': os.path.join(workdir, 'detail_cache.json'),
+        })
+        dumps_dir = os.path.join(workdir, 'dumps_resume')
+        os.makedirs(dumps_dir)
+
+        _, checkpoint, _ = fetch(server, dumps_dir)
+        if checkpoint["complete"]:
+            problems.append(f"run with page {args.fail_page} failing was marked complete")
+        if checkpoint["page"] != args.fail_page - 1:
+            problems.append(f"checkpoint stopped at page {checkpoint['page']}, expected {args.fail_page - 1}")
+
+        server.httpd.failing_pages.clear()
+        order_count, checkpoint, order_numbers = fetch(server, dumps_dir)
+        expected = [order["order_number"] for order in server.httpd.orders]
+        if not checkpoint["complete"]:
+            problems.append("resumed run was not marked complete")
+        if order_numbers != expected:
+            missing = len(set(expected) - set(order_numbers))
+            problems.append(f"resumed run has {order_count} of {len(expected)} orders ({missing} missing)")
+    return problems
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Check that --resume recovers a failed listing page")
+    parser.add_argument('--orders', type=int, default=100, help="number of generated orders")
+    parser.add_argument('--page-size', type=int, default=20, help="orders per listing page")
+    parser.add_argument('--fail-page', type=int, default=3, help="listing page answered with 404 in the first run")
+    parser.add_argument('--workers', type=int, default=4, help="KKTIX_HTTP_WORKERS")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the check with and without prefetch and print the outcome"""
+    args = parse_args(argv)
+    failed = False
+    for prefetch in (False, True):
+        problems = check(args, prefetch)
+        label = "prefetch" if prefetch else "sequential"
+        if problems:
+            failed = True
+            for problem in problems:
+                print(f"{label}: FAIL {problem}")
+        else:
+            print(f"{label}: ok, page {args.fail_page} was fetched again on resume")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
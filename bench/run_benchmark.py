@@ -0,0 +1,220 @@
+"""
+Offline scraper benchmark against the fake KKTIX server
+
+Runs KKTIXScraper.login() and get_order_details() with headless Chrome
+against generated order histories and reports orders/sec, WebDriver calls
+per order and peak RSS, optionally appending the results to a JSONL file
+so runs can be compared over time.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fake_kktix import FakeKKTIXServer  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class WebDriverCallCounter:
+    """Count WebDriver commands sent by every driver instance."""
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+        self.original = None
+
+    def __enter__(self):
+        from selenium.webdriver.remote.webdriver import WebDriver
+
+        self.original = WebDriver.execute
+        counter = self
+
+        def execute(driver, driver_command, params=None):
+            with counter.lock:
+                counter.count += 1
+            return counter.original(driver, driver_command, params)
+
+        WebDriver.execute = execute
+        return self
+
+    def __exit__(self, *exc_info):
+        from selenium.webdriver.remote.webdriver import WebDriver
+
+        WebDriver.execute = self.original
+
+class PeakRSSSampler(threading.Thread):
+    """Sample the RSS of this process and its children (chromedriver, Chrome)."""
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        process = psutil.Process()
+        while not self.stopped.is_set():
+            total = 0
+            for proc in [process] + process.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.peak = max(self.peak, total)
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.peak
+
+def scrape(mode):
+    """Log in and collect every order, returning (order_count, login_seconds)"""
+    from scraper import KKTIXScraper
+
+    scraper = KKTIXScraper()
+    try:
+        started = time.perf_counter()
+        scraper.login()
+        login_seconds = time.perf_counter() - started
+
+        if mode == 'http':
+            from http_fetcher import KKTIXHttpFetcher
+
+            cookies = scraper.driver.get_cookies()
+            scraper.quit()
+            fetcher = KKTIXHttpFetcher(cookies, dumps_dir=scraper.dumps_dir)
+            try:
+                return fetcher.get_order_details(), login_seconds
+            finally:
+                fetcher.quit()
+
+        return scraper.get_order_details(), login_seconds
+    finally:
+        scraper.quit()
+
+def run_benchmark(args):
+    """Run one benchmark and return the result record"""
+    with FakeKKTIXServer(args.orders, args.page_size, args.latency, error_rate=args.error_rate) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({
+            'KKTIX_BASE_URL': server.url,
+            'KKTIX_EMAIL': 'bench@example.com',
+            'KKTIX_PASSWORD': 'bench',
+            'KKTIX_HEADLESS': 'true',
+            'KKTIX_REUSE_SESSION': 'false',
+            'KKTIX_DETAIL_WORKERS': str(args.workers),
+            'KKTIX_HTTP_WORKERS': str(args.workers),
+            'KKTIX_PREFETCH_PAGES': 'true' if args.prefetch else 'false',
+            'KKTIX_RATE_LIMIT': str(args.rate_limit),
+            'KKTIX_BLOCK_RESOURCES': 'false' if args.no_block else 'true',
+            'KKTIX_METRICS': 'true' if args.page_stats else 'false',
+            'KKTIX_STORE_PATH': os.path.join(workdir, 'orders_store.json'),
+            'KKTIX_DETAIL_CACHE': os.path.join(workdir, 'detail_cache.json'),
+            'KKTIX_COOKIES_FILE': os.path.join(workdir, 'kktix_cookies.json'),
+        })
+        cwd = os.getcwd()
+        os.chdir(workdir)
+
+        sampler = PeakRSSSampler() if psutil else None
+        if sampler:
+            sampler.start()
+        try:
+            with WebDriverCallCounter() as counter:
+                started = time.perf_counter()
+                order_count, login_seconds = scrape(args.mode)
+                elapsed = time.perf_counter() - started
+            page_loads = None
+            if args.page_stats:
+                from metrics import setup_metrics
+
+                page_loads = setup_metrics().report()["page_loads"]
+        finally:
+            os.chdir(cwd)
+            peak_rss = sampler.stop() if sampler else None
+
+    if peak_rss is None:
+        # Without psutil only this process is measured (ru_maxrss is KiB on Linux)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "mode": args.mode,
+        "orders": args.orders,
+        "page_size": args.page_size,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "rate_limit": args.rate_limit,
+        "resource_blocking": not args.no_block,
+        "workers": args.workers,
+        "prefetch": args.prefetch,
+        "orders_scraped": order_count,
+        "login_seconds": round(login_seconds, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "orders_per_second": round(order_count / elapsed, 2) if elapsed else None,
+        "webdriver_calls": counter.count,
+        "webdriver_calls_per_order": round(counter.count / order_count, 2) if order_count else None,
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+        "rss_scope": "process tree" if psutil else "python process",
+        "page_loads": page_loads
+    }
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark the KKTIX scraper against a local fake server")
+    parser.add_argument('--orders', type=int, default=100, help="number of generated orders")
+    parser.add_argument('--page-size', type=int, default=20, help="orders per listing page")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of order pages answered with 503")
+    parser.add_argument('--no-block', action='store_true', help="load images, fonts and trackers too")
+    parser.add_argument(
+        '--page-stats',
+        action='store_true',
+        help=(
+            "enable KKTIX_METRICS and report bytes (from Chrome's performance log) and loadEventEnd per page; "
+            "each page then waits for its load event and drains the performance log"
+        )
+    )
+    parser.add_argument('--rate-limit', type=float, default=0, help="KKTIX_RATE_LIMIT requests/sec (0: unlimited)")
+    parser.add_argument('--workers', type=int, default=1, help="detail/prefetch workers")
+    parser.add_argument('--prefetch', action='store_true', help="prefetch listing pages by URL")
+    parser.add_argument('--mode', choices=['selenium', 'http'], default='selenium')
+    parser.add_argument('--output', help="append the result as a JSON line to this file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmark and print its report"""
+    args = parse_args(argv)
+    result = run_benchmark(args)
+
+    print(
+        f"{result['orders_scraped']} orders in {result['elapsed_seconds']:.2f}s "
+        f"({result['orders_per_second']} orders/sec), "
+        f"{result['webdriver_calls']} WebDriver calls "
+        f"({result['webdriver_calls_per_order']} per order), "
+        f"peak RSS {result['peak_rss_mb']} MB ({result['rss_scope']})"
+    )
+    if result["page_loads"]:
+        print(
+            f"{result['page_loads']['count']} page loads, "
+            f"{result['page_loads']['mean_bytes'] / 1024:.1f} KB per page, "
+            f"loaded after {result['page_loads']['mean_load_ms']} ms "
+            f"(resource blocking {'on' if result['resource_blocking'] else 'off'})"
+        )
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Startup benchmark for the render command
+
+Writes a generated orders dump to a temporary directory, runs
+`main.py render --no-open` on it under `python -X importtime` several times
+and reports the median wall time, the time spent importing modules, the
+slowest imports and whether the browser stack (selenium, dotenv, requests)
+was loaded. With --from-db the dump is imported into a SQLite history
+first and `render --from-db` is measured instead.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from fake_kktix import generate_orders
+
+MAIN = Path(__file__).resolve().parent.parent / 'src' / 'main.py'
+BROWSER_STACK = ('selenium', 'dotenv', 'requests')
+
+def write_dump(workdir, count):
+    """Write the generated orders as a scraped orders_*.json dump"""
+    dumps_dir = os.path.join(workdir, 'dumps_20240101_000000')
+    os.makedirs(dumps_dir)
+    orders = [
+        {
+            "order_number": order["order_number"],
+            "event_title": order["event_title"],
+            "thumbnail_url": "",
+            "details": {
+                "Event Host": order["host"],
+                "Event Location": order["location"],
+                "Start Time": f"{order['date']} {order['start']}(+0800) ~ {order['end']}(+0800)",
+                "Amount": f"TWD${order['amount']}" if order["amount"] else "FREE"
+            },
+            "actions": []
+        }
+        for order in generate_orders(count)
+    ]
+    with open(os.path.join(dumps_dir, 'orders_20240101_000000.json'), 'w', encoding='utf-8') as f:
+        json.dump(orders, f, ensure_ascii=False)
+
+def parse_importtime(stderr):
+    """Return {module: cumulative_us} for top-level imports from -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented below the module that imported them
+        if not name[1:].startswith(' '):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+def run_render(workdir, from_db=False):
+    """Run the render command once and return (wall_seconds, imports)"""
+    env = dict(os.environ, KKTIX_DEBUG='false')
+    command = [sys.executable, '-X', 'importtime', str(MAIN), 'render', '--no-open']
+    if from_db:
+        command.append('--from-db')
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, parse_importtime(completed.stderr)
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Measure the startup time of main.py render")
+    parser.add_argument('--orders', type=int, default=1000, help="number of orders in the dump")
+    parser.add_argument('--runs', type=int, default=5, help="number of render runs")
+    parser.add_argument('--top', type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument('--from-db', action='store_true', help="measure render --from-db on an imported history")
+    parser.add_argument('--output', help="append the result as a JSON line to this file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmark and print its report"""
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        write_dump(workdir, args.orders)
+        if args.from_db:
+            subprocess.run(
+                [sys.executable, str(MAIN), 'import'],
+                cwd=workdir, env=dict(os.environ, KKTIX_DEBUG='false'), capture_output=True, check=True
+            )
+        runs = [run_render(workdir, args.from_db) for _ in range(args.runs)]
+
+    walls = [wall for wall, _ in runs]
+    imports = runs[-1][1]
+    loaded = [name for name in imports if name.split('.')[0] in BROWSER_STACK]
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "orders": args.orders,
+        "runs": args.runs,
+        "from_db": args.from_db,
+        "median_seconds": round(statistics.median(walls), 3),
+        "min_seconds": round(min(walls), 3),
+        "import_seconds": round(sum(imports.values()) / 1e6, 3),
+        "browser_stack_loaded": loaded
+    }
+
+    print(
+        f"render{' --from-db' if args.from_db else ''} of {args.orders} orders: median {result['median_seconds']:.3f}s, "
+        f"min {result['min_seconds']:.3f}s over {args.runs} runs, "
+        f"{result['import_seconds']:.3f}s importing modules"
+    )
+    print("Slowest imports:")
+    for name, cumulative in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    print(f"Browser stack loaded: {', '.join(loaded) if loaded else 'none'}")
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+    return 1 if loaded else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Batch scraping of several KKTIX accounts with a bounded process pool
+"""
+
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from dotenv import dotenv_values
+
+from main import copy_and_update_timeline
+from metrics import reset_metrics
+from normalize import build_summary, normalize_dump
+from order_db import OrderDatabase
+from scraper import KKTIXScraper
+from thumbnails import ThumbnailCache, localize_dump
+from utils import setup_logger, write_orders_json
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+COMBINED_FILENAME = 'orders_combined.json'
+REPORT_FILENAME = 'batch_report.json'
+
+def load_accounts(path):
+    """Load the accounts file into a list of {"name", "env"} dicts
+
+    Each entry has an optional "name" plus either "email"/"password" or an
+    "env_file" such as .env.team-a; any other KKTIX_* settings can be given
+    under "env". Names default to the email and must be unique.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    accounts = []
+    names = set()
+    for entry in entries:
+        env = {}
+        if entry.get("env_file"):
+            env.update({key: value for key, value in dotenv_values(entry["env_file"]).items() if value is not None})
+        if entry.get("email"):
+            env["KKTIX_EMAIL"] = entry["email"]
+        if entry.get("password"):
+            env["KKTIX_PASSWORD"] = entry["password"]
+        env.update({key: str(value) for key, value in entry.get("env", {}).items()})
+
+        if not env.get("KKTIX_EMAIL") or not env.get("KKTIX_PASSWORD"):
+            raise ValueError(f"Account entry {entry.get('name') or entry.get('env_file')!r} has no credentials")
+
+        name = re.sub(r'[^\w.@-]', '_', entry.get("name") or env["KKTIX_EMAIL"])
+        if name in names:
+            raise ValueError(f"Duplicate account name {name!r}")
+        names.add(name)
+        accounts.append({"name": name, "env": env})
+    return accounts
+
+def available_memory_mb():
+    """Memory available for new processes in MB, or None if it cannot be read"""
+    if psutil:
+        return psutil.virtual_memory().available // (1024 * 1024)
+    try:
+        with open('/proc/meminfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except (IOError, ValueError):
+        pass
+    return None
+
+def batch_worker_count(account_count, max_workers=None):
+    """Number of accounts to scrape at once, bounded by CPUs, memory and KKTIX_BATCH_WORKERS
+
+    Every account runs one Chrome plus its detail worker browsers, each
+    budgeted at KKTIX_CHROME_MEMORY_MB (default 400).
+    """
+    logger = setup_logger()
+    workers = max_workers or int(os.getenv('KKTIX_BATCH_WORKERS', '0')) or os.cpu_count() or 1
+    workers = min(workers, account_count)
+
+    detail_workers = max(1, int(os.getenv('KKTIX_DETAIL_WORKERS', '1')))
+    browsers_per_account = 1 + (detail_workers if detail_workers > 1 else 0)
+    account_mb = browsers_per_account * int(os.getenv('KKTIX_CHROME_MEMORY_MB', '400'))
+
+    memory_mb = available_memory_mb()
+    if memory_mb is not None:
+        workers = min(workers, max(1, memory_mb // account_mb))
+        logger.info(
+            "%d MB available, %d MB per account: scraping %d account(s) at once",
+            memory_mb, account_mb, workers
+        )
+    else:
+        logger.warning("Could not read available memory, scraping %d account(s) at once", workers)
+    return max(1, workers)
+
+def scrape_account(account, dumps_dir, incremental=False, refresh=False):
+    """Scrape one account into dumps_dir in a worker process and return its result record
+
+    The account's environment is applied for the duration of the scrape,
+    and its order store, cookies and detail cache live under
+    accounts/<name>/ unless the account's env overrides them. So does its
+    Chrome profile when KKTIX_CHROME_PROFILE is set.
+    """
+    logger = setup_logger()
+    state_dir = os.path.join('accounts', account["name"])
+    os.makedirs(state_dir, exist_ok=True)
+    os.makedirs(dumps_dir, exist_ok=True)
+
+    overrides = {
+        'KKTIX_STORE_PATH': os.path.join(state_dir, 'orders_store.json'),
+        'KKTIX_COOKIES_FILE': os.path.join(state_dir, 'kktix_cookies.json'),
+        'KKTIX_DETAIL_CACHE': os.path.join(state_dir, 'detail_cache.json')
+    }
+    # Chrome refuses a profile another worker has open, and a shared profile
+    # would restore one account's login for every other account
+    if os.getenv('KKTIX_CHROME_PROFILE'):
+        overrides['KKTIX_CHROME_PROFILE'] = os.path.join(state_dir, 'chrome_profile')
+
+    saved_env = dict(os.environ)
+    os.environ.update({**overrides, **account["env"]})
+    metrics = reset_metrics()
+    result = {"name": account["name"], "dumps_dir": dumps_dir, "status": "failed"}
+    scraper = None
+    try:
+        logger.info("Scraping account %s into %s", account["name"], dumps_dir)
+        scraper = KKTIXScraper(dumps_dir=dumps_dir)
+        scraper.login()
+        result["order_count"] = scraper.get_order_details(incremental=incremental, refresh=refresh)
+        result["json_filename"] = scraper.latest_json_filename
+
+        if os.getenv('KKTIX_THUMBNAILS', 'true').lower() == 'true':
+            with metrics.phase("thumbnails"):
+                localize_dump(dumps_dir, scraper.latest_json_filename)
+        with metrics.phase("normalize"):
+            summary_filename = normalize_dump(dumps_dir, scraper.latest_json_filename)
+        # Keep the cross-run history in SQLite up to date, as a single-account scrape does
+        if os.getenv('KKTIX_DB', 'true').lower() == 'true':
+            with metrics.phase("db_upsert"):
+                db = OrderDatabase()
+                try:
+                    db.import_dumps([os.path.join(dumps_dir, scraper.latest_json_filename)])
+                finally:
+                    db.close()
+        with metrics.phase("copy_and_update_timeline"):
+            copy_and_update_timeline(dumps_dir, scraper.latest_json_filename, summary_filename)
+        result["status"] = "ok"
+    except Exception as e:  # One account's failure must not stop the batch
+        logger.error("Account %s failed: %s", account["name"], str(e))
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if scraper:
+            scraper.quit()
+            metrics.write(dumps_dir)
+        os.environ.clear()
+        os.environ.update(saved_env)
+    return result
+
+def write_combined_orders(batch_dir, results):
+    """Merge the successful accounts' orders into one normalized dump and summary
+
+    Every order gets an "account" field. Returns (json_filename,
+    summary_filename, order_count).
+    """
+    orders = []
+    for result in results:
+        if result["status"] != "ok":
+            continue
+        with open(os.path.join(result["dumps_dir"], result["json_filename"]), 'r', encoding='utf-8') as f:
+            for order_info in json.load(f):
+                order_info["account"] = result["name"]
+                orders.append(order_info)
+
+    # Account timelines point at the thumbnail cache relative to their own directory
+    if os.getenv('KKTIX_THUMBNAILS', 'true').lower() == 'true':
+        cache = ThumbnailCache()
+        try:
+            cache.localize(orders, batch_dir)
+        finally:
+            cache.close()
+
+    # Newest first across accounts; orders without a start time go last
+    orders.sort(key=lambda order_info: order_info["normalized"]["start"] or 0, reverse=True)
+
+    write_orders_json(os.path.join(batch_dir, COMBINED_FILENAME), orders)
+
+    summary_filename = COMBINED_FILENAME.replace('.json', '.summary.json')
+    with open(os.path.join(batch_dir, summary_filename), 'w', encoding='utf-8') as f:
+        json.dump(build_summary(orders), f, ensure_ascii=False, indent=2)
+    return COMBINED_FILENAME, summary_filename, len(orders)
+
+def scrape_accounts(accounts, batch_dir, workers, incremental=False, refresh=False):
+    """Scrape accounts with a pool of spawned worker processes
+
+    Returns (results by account name, accounts whose worker process crashed).
+    """
+    logger = setup_logger()
+    results = {}
+    broken = []
+    # Spawned workers start clean instead of inheriting this process's threads and handlers
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(
+                scrape_account,
+                account,
+                os.path.join(batch_dir, account["name"]),
+                incremental,
+                refresh
+            ): account
+            for account in accounts
+        }
+        for future in as_completed(futures):
+            account = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                logger.error("Worker pool broke before account %s finished: %s", account["name"], str(e))
+                broken.append(account)
+                result = {
+                    "name": account["name"],
+                    "dumps_dir": os.path.join(batch_dir, account["name"]),
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}"
+                }
+            results[account["name"]] = result
+            logger.info("Account %s finished: %s", account["name"], result["status"])
+    return results, broken
+
+def run_batch(accounts_path, incremental=False, refresh=False, max_workers=None):
+    """Scrape every account in accounts_path and render a combined timeline
+
+    Returns (batch_dir, results); results hold one record per account in
+    the order of the accounts file.
+    """
+    logger = setup_logger()
+    accounts = load_accounts(accounts_path)
+    batch_dir = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(batch_dir, exist_ok=True)
+
+    workers = batch_worker_count(len(accounts), max_workers)
+    logger.info("Batch of %d account(s) with %d worker process(es) in %s", len(accounts), workers, batch_dir)
+
+    results, broken = scrape_accounts(accounts, batch_dir, workers, incremental, refresh)
+
+    # A worker process that dies breaks the whole pool, failing every account still queued on it;
+    # retry those one per pool so only the account that actually crashed is lost
+    for account in broken:
+        logger.info("Retrying account %s in its own process", account["name"])
+        retried, _ = scrape_accounts([account], batch_dir, 1, incremental, refresh)
+        results.update(retried)
+
+    results = [results[account["name"]] for account in accounts]
+    with open(os.path.join(batch_dir, REPORT_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    succeeded = [result for result in results if result["status"] == "ok"]
+    if succeeded:
+        json_filename, summary_filename, order_count = write_combined_orders(batch_dir, succeeded)
+        copy_and_update_timeline(batch_dir, json_filename, summary_filename)
+        logger.info("Combined timeline of %d orders from %d account(s)", order_count, len(succeeded))
+
+    failed = [result["name"] for result in results if result["status"] != "ok"]
+    if failed:
+        logger.warning("Failed accounts: %s", ", ".join(failed))
+    return batch_dir, results
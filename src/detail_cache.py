@@ -0,0 +1,103 @@
+"""
+On-disk cache for parsed Check/Edit Details results
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from utils import parse_kktix_time, setup_logger
+
+class DetailCache:
+    """LRU cache of detail page results keyed by the Check/Edit Details URL.
+
+    Entries for events that have already started never expire; entries for
+    upcoming events expire after a TTL since their start time can still move.
+    """
+    def __init__(self, path=None, ttl_hours=None, max_entries=None):
+        self.logger = setup_logger()
+        self.path = path or os.getenv('KKTIX_DETAIL_CACHE', 'detail_cache.json')
+        self.ttl = 3600 * float(ttl_hours or os.getenv('KKTIX_DETAIL_CACHE_TTL', '24'))
+        self.max_entries = int(max_entries or os.getenv('KKTIX_DETAIL_CACHE_SIZE', '5000'))
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        """Load cache entries from disk, least recently used first"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = OrderedDict(json.load(f))
+        except (IOError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable detail cache %s: %s", self.path, str(e))
+            self.entries = OrderedDict()
+            return
+        self.logger.info("Loaded %d cached detail pages from %s", len(self.entries), self.path)
+
+    def save(self):
+        """Write cache entries to disk atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def is_fresh(self, entry, now=None):
+        """Return True if an entry can be used without refetching"""
+        now = now or time.time()
+        start = parse_kktix_time(entry["result"].get("Start Time"))
+        if start is not None and start <= datetime.now(timezone.utc):
+            return True
+        return now - entry["fetched_at"] < self.ttl
+
+    def get(self, url):
+        """Return the cached result for a URL, or None if missing or expired"""
+        entry = self.entries.get(url)
+        if entry is None or not self.is_fresh(entry):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(url)
+        self.hits += 1
+        return entry["result"]
+
+    def put(self, url, result):
+        """Store a result, evicting the least recently used entries over the cap"""
+        self.entries[url] = {"fetched_at": time.time(), "result": result}
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def resolve(self, pending_details, fetch, refresh=False):
+        """Resolve (order_number, url) pairs through the cache
+
+        Misses are passed to fetch(), which returns results keyed by order
+        number; those results are cached and the cache is saved. With
+        refresh every entry is treated as a miss.
+        """
+        event_times = {}
+        missing = []
+        for order_number, url in pending_details:
+            result = None if refresh else self.get(url)
+            if result is None:
+                if refresh:
+                    self.misses += 1
+                missing.append((order_number, url))
+            else:
+                event_times[order_number] = dict(result)
+
+        fetched = fetch(missing)
+        for order_number, url in missing:
+            if order_number in fetched:
+                self.put(url, fetched[order_number])
+        event_times.update(fetched)
+
+        self.logger.info(
+            "Detail cache: %d hits, %d misses, %d entries", self.hits, self.misses, len(self.entries)
+        )
+        if pending_details:
+            self.save()
+        return event_times
@@ -0,0 +1,186 @@
+"""
+Browserless fetcher for KKTIX orders using cookies from a Selenium login
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from detail_cache import DetailCache
+from metrics import setup_metrics
+from order_parser import (
+    find_last_page,
+    find_next_page,
+    parse_event_time,
+    parse_order_rows,
+)
+from request_scheduler import CircuitOpenError, RequestScheduler
+from order_stream import collect_orders
+from utils import create_dumps_dir, setup_logger
+
+class SessionExpiredError(RuntimeError):
+    """Raised when KKTIX redirects to the sign-in page."""
+
+def is_transient_error(error):
+    """Timeouts, dropped connections, 429 and 5xx responses are worth retrying"""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is not None and (status == 429 or status >= 500)
+    return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+class KKTIXHttpFetcher:
+    """Fetch order listings and detail pages over a pooled keep-alive HTTP session."""
+    def __init__(self, cookies, root_url=None, workers=None, dumps_dir=None):
+        self.logger = setup_logger()
+        self.metrics = setup_metrics()
+        self.root_url = (root_url or os.getenv('KKTIX_BASE_URL', 'https://kktix.com')).rstrip('/')
+        self.base_url = f"{self.root_url}/account/orders"
+        self.workers = workers or max(1, int(os.getenv('KKTIX_HTTP_WORKERS', '4')))
+
+        # One keep-alive connection per worker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (kktix-timeline)'})
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain', ''),
+                path=cookie.get('path', '/')
+            )
+        self.logger.info("HTTP fetch mode with %d worker(s) against %s", self.workers, self.root_url)
+
+        # Every request goes through one scheduler for rate limiting, retries and backoff
+        self.scheduler = RequestScheduler(max_concurrency=self.workers, transient=is_transient_error)
+
+        # Fetch listing pages concurrently once the last page number is known
+        self.prefetch_pages = os.getenv('KKTIX_PREFETCH_PAGES', 'false').lower() == 'true'
+
+        self.dumps_dir = dumps_dir or create_dumps_dir()
+        self.latest_json_filename = None
+        self.detail_cache = DetailCache()
+
+    def fetch(self, url, timeout=20):
+        """GET a page and return (html, final_url), raising on expired sessions"""
+        try:
+            response = self.session.get(url, timeout=timeout)
+        except requests.Timeout:
+            self.metrics.record_timeout()
+            raise
+        response.raise_for_status()
+        if '/users/sign_in' in response.url:
+            raise SessionExpiredError(f"Session expired while fetching {url}")
+        return response.text, response.url
+
+    def get_order_details(self, incremental=False, refresh=False):
+        """Extract order details from all pages, like KKTIXScraper.get_order_details()
+
+        Returns the number of orders in the final JSON file.
+        """
+        return collect_orders(self, self.iter_listing_pages, self.resolve_event_times, incremental, refresh)
+
+    def iter_listing_pages(self, prefetch=False, start_page=1):
+        """Yield (page, orders) for every listing page from start_page in order
+
+        Pages are followed one at a time until there is no "next" link, or
+        with prefetch the last page number is read from the first page and
+        the remaining pages are fetched concurrently.
+        """
+        page = start_page
+        while True:
+            html = self.fetch_listing_page(page)
+            if html is None:
+                return
+            yield page, self.parse_listing_page(page, html)
+
+            if prefetch and page == start_page:
+                yield from self.prefetch_listing_pages(page + 1, find_last_page(html))
+                return
+            if find_next_page(html) is None:
+                self.logger.info("Reached last page")
+                return
+            page += 1
+
+    def prefetch_listing_pages(self, first_page, last_page):
+        """Fetch listing pages first_page..last_page concurrently and yield them in order
+
+        Pages are fetched in batches of one page per worker so only a batch
+        of pages is held in memory at a time. Nothing after a page that
+        failed is yielded, so the checkpoint stops before the gap and
+        --resume fetches the failed page again.
+        """
+        pages = list(range(first_page, last_page + 1))
+        if not pages:
+            self.logger.info("Reached last page")
+            return
+        self.logger.info("Prefetching pages %d-%d with %d worker(s)", first_page, last_page, self.workers)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for start in range(0, len(pages), self.workers):
+                batch = pages[start:start + self.workers]
+                for page, html in zip(batch, executor.map(self.fetch_listing_page, batch)):
+                    if html is None:
+                        return
+                    yield page, self.parse_listing_page(page, html)
+
+    def fetch_listing_page(self, page):
+        """Fetch one listing page and log its latency, or None on error"""
+        started = time.perf_counter()
+        try:
+            with self.metrics.phase("listing_page"):
+                # Pagination cannot skip a page, so sit out an open circuit instead of stopping
+                html, _ = self.scheduler.call(partial(self.fetch, f"{self.base_url}?page={page}"), wait=True)
+        except requests.RequestException as e:
+            self.logger.error("HTTP error on page %d: %s", page, str(e))
+            self.scheduler.record_failure("listing", page, f"{self.base_url}?page={page}", e)
+            self.listing_failed = True
+            return None
+        self.logger.info("Page %d loaded in %.2fs", page, time.perf_counter() - started)
+        return html
+
+    def parse_listing_page(self, page, html):
+        """Parse the orders out of one fetched listing page"""
+        with self.metrics.phase("listing_parse"):
+            return parse_order_rows(html, f"{self.base_url}?page={page}")
+
+    def resolve_event_times(self, pending_details):
+        """Fetch Check/Edit Details pages concurrently, keyed by order number"""
+        if not pending_details:
+            return {}
+        self.logger.info("Resolving %d detail pages with %d worker(s)", len(pending_details), self.workers)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(lambda item: self.fetch_event_time(*item), pending_details)
+            return {
+                order_number: result
+                for (order_number, _), result in zip(pending_details, results)
+                if result
+            }
+
+    def fetch_event_time(self, order_number, url):
+        """Extract Event Time and Start Time from one detail page"""
+        try:
+            with self.metrics.phase("detail_page"):
+                html, _ = self.scheduler.call(partial(self.fetch, url, timeout=10))
+                result = parse_event_time(html)
+        except (requests.RequestException, SessionExpiredError, CircuitOpenError) as e:
+            self.logger.warning("Error extracting detailed time for order %s: %s", order_number, str(e))
+            self.scheduler.record_failure("detail", order_number, url, e)
+            return None
+
+        if result is None:
+            self.logger.warning("Error extracting detailed time for order %s: time cell not found", order_number)
+            self.scheduler.record_failure("detail", order_number, url, "time cell not found")
+        else:
+            self.logger.debug("Parsed times - Start: %s", result["Start Time"])
+        return result
+
+    def quit(self):
+        """Clean up resources"""
+        self.session.close()
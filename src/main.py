@@ -1,27 +1,51 @@
 """
 Main script for KKTIX orders
+
+Commands:
+    scrape  log in, fetch the orders and render their timeline (the default)
+    render  re-render the timeline of an existing dump or of the SQLite history
+    serve   serve a dump or the SQLite history from the local timeline server
+    import  load orders_*.json dumps into the SQLite history
+
+Only scrape imports Selenium, requests and python-dotenv, so the other
+commands start without loading the browser stack.
 """
 
+import argparse
+import json
 import os
+import shutil
+import sqlite3
 import sys
+import time
 import webbrowser
 from json import JSONDecodeError
 from pathlib import Path
 
-from dotenv import load_dotenv
-from selenium.common.exceptions import WebDriverException
+from normalize import normalize_dump
+from order_db import OrderDatabase
+from order_stream import find_latest_dump, find_resumable_dumps_dir
+from timeline_payload import build_payload, write_payload
+from utils import create_dumps_dir, load_cookies, load_env_file, setup_logger
 
-from scraper import KKTIXScraper
-from utils import setup_logger
+COMMANDS = ('scrape', 'render', 'serve', 'import')
+# Outside the dumps_* glob so find_latest_dump() keeps returning the newest scrape
+DB_RENDER_DIR = 'db_render'
 
-load_dotenv()  # Load environment variables from .env file
-
-def copy_and_update_timeline(dumps_dir, json_filename):
+def copy_and_update_timeline(dumps_dir, json_filename, summary_filename=None):
     """Copy timeline files and update with JSON data"""
+    logger = setup_logger()
+    
     # Read JSON data
     json_path = Path(dumps_dir) / json_filename
     with open(json_path, 'r', encoding='utf-8') as f:
-        json_data = f.read()
+        orders = json.load(f)
+    
+    # Read precomputed filter values and totals from the normalization stage
+    summary_data = 'null'
+    if summary_filename:
+        with open(Path(dumps_dir) / summary_filename, 'r', encoding='utf-8') as f:
+            summary_data = json.dumps(json.load(f), ensure_ascii=False, separators=(',', ':'))
     
     # Copy all template files
     src_dir = Path(__file__).parent
@@ -33,34 +57,214 @@ def copy_and_update_timeline(dumps_dir, json_filename):
         with open(src_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Replace data injection placeholder if it's the HTML file
-        if filename == 'timeline.html':
-            content = content.replace(
-                "// [TIMELINE_DATA_INJECTION]",
-                f"const timelineData = {json_data};"
-            )
-        
         # Write updated content to destination
         with open(dst_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            if filename != 'timeline.html':
+                f.write(content)
+                continue
+            
+            # Stream the columnar payload in place of the data injection placeholder
+            before, after = content.split("// [TIMELINE_DATA_INJECTION]", 1)
+            f.write(before)
+            f.write("const timelinePayload = ")
+            payload_size = write_payload(build_payload(orders), f)
+            f.write(";\n        const timelineData = decodeTimelinePayload(timelinePayload);")
+            f.write(f"\n        const timelineSummary = {summary_data};")
+            f.write(after)
     
+    logger.info(
+        "Timeline payload: %d bytes (orders JSON: %d bytes)",
+        payload_size, os.path.getsize(json_path)
+    )
     return Path(dumps_dir) / 'timeline.html'
 
-def main():
-    """Main execution function for KKTIX order processing and visualization."""
-    logger = setup_logger()
-    scraper = None
+def add_history_arguments(parser):
+    """Options selecting which orders render and serve show"""
+    parser.add_argument(
+        'dump',
+        nargs='?',
+        help="orders_*.json file or dumps directory (default: the newest dumps_*/orders_*.json)"
+    )
+    parser.add_argument(
+        '--from-db',
+        action='store_true',
+        help="use the SQLite history instead of a dump"
+    )
+    parser.add_argument('--host', help="with --from-db, only include this event host")
+    parser.add_argument('--year', type=int, help="with --from-db, only include events in this year")
+    parser.add_argument('--location', help="with --from-db, only include this event location")
+
+def parse_args(argv=None):
+    """Parse command line arguments; without a command, scrape"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['scrape'] + argv
+    
+    parser = argparse.ArgumentParser(description="Scrape KKTIX orders and render a timeline")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    
+    scrape_parser = commands.add_parser('scrape', help="log in, fetch the orders and render their timeline (default)")
+    scrape_parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="stop paginating once already-known orders are reached and merge with the order store"
+    )
+    scrape_parser.add_argument(
+        '--http',
+        action='store_true',
+        help="log in with Chrome once (or reuse saved cookies) and fetch pages over plain HTTP"
+    )
+    scrape_parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="continue the newest unfinished run from its last checkpointed page"
+    )
+    scrape_parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help="ignore cached detail pages and stored event times and fetch them again"
+    )
+    scrape_parser.add_argument(
+        '--batch',
+        metavar='ACCOUNTS_FILE',
+        help="scrape every account in this JSON file in parallel and render a combined timeline"
+    )
+    scrape_parser.add_argument(
+        '--batch-workers',
+        type=int,
+        help="maximum number of accounts scraped at once (default: bounded by CPUs and memory)"
+    )
+    
+    render_parser = commands.add_parser('render', help="re-render the timeline without scraping")
+    add_history_arguments(render_parser)
+    render_parser.add_argument(
+        '--no-open',
+        action='store_true',
+        help="write timeline.html without opening it in the browser"
+    )
+    
+    serve_parser = commands.add_parser('serve', help="serve the timeline from a local server with a query API")
+    add_history_arguments(serve_parser)
+    serve_parser.add_argument('--port', type=int, default=8000, help="port to listen on (default: 8000)")
     
+    import_parser = commands.add_parser('import', help="import dumps into the SQLite history")
+    import_parser.add_argument(
+        'dumps',
+        nargs='*',
+        metavar='DUMP',
+        help="orders_*.json files to import (default: every dumps_*/orders_*.json)"
+    )
+    return parser.parse_args(argv)
+
+def login_and_save_cookies(dumps_dir, reuse_session=True):
+    """Log in with Selenium, save the session cookies and shut Chrome down"""
+    from scraper import KKTIXScraper
+    
+    scraper = KKTIXScraper(dumps_dir=dumps_dir)
     try:
-        scraper = KKTIXScraper()
+        scraper.reuse_session = reuse_session
         scraper.login()
-        orders = scraper.get_order_details()
+        return load_cookies(scraper.save_cookies())
+    finally:
+        scraper.quit()
+
+def fetch_orders_over_http(incremental, refresh, dumps_dir, logger):
+    """Fetch orders without a browser, logging in again if saved cookies expired"""
+    from http_fetcher import KKTIXHttpFetcher, SessionExpiredError
+    
+    dumps_dir = dumps_dir or create_dumps_dir()
+    cookies = load_cookies(os.getenv('KKTIX_COOKIES_FILE', 'kktix_cookies.json'))
+    if cookies is None:
+        cookies = login_and_save_cookies(dumps_dir)
+    
+    fetcher = KKTIXHttpFetcher(cookies, dumps_dir=dumps_dir)
+    try:
+        order_count = fetcher.get_order_details(incremental=incremental, refresh=refresh)
+    except SessionExpiredError:
+        logger.info("Saved session expired, logging in again")
+        fetcher.quit()
+        # The saved cookies were just rejected, so go straight to the form;
+        # the checkpoint in dumps_dir lets the new fetcher pick up where this one stopped
+        fetcher = KKTIXHttpFetcher(login_and_save_cookies(dumps_dir, reuse_session=False), dumps_dir=dumps_dir)
+        order_count = fetcher.get_order_details(incremental=incremental, refresh=refresh)
+    finally:
+        fetcher.quit()
+    return fetcher, order_count
+
+def run_batch_mode(args, logger):
+    """Scrape several accounts and open their combined timeline"""
+    # Imported here because batch imports this module for copy_and_update_timeline
+    from batch import run_batch
+    
+    batch_dir, results = run_batch(args.batch, args.incremental, args.refresh, args.batch_workers)
+    failed = [result["name"] for result in results if result["status"] != "ok"]
+    if len(failed) < len(results):
+        file_url = f'file://{os.path.abspath(os.path.join(batch_dir, "timeline.html"))}'
+        webbrowser.open(file_url)
+        logger.info("Combined timeline opened at: %s", file_url)
+    return 1 if failed else 0
+
+def scrape(args, logger):
+    """Scrape the orders, render their timeline and open it"""
+    # The browser stack is what makes startup slow, so only this command loads it
+    started = time.perf_counter()
+    from selenium.common.exceptions import WebDriverException
+    
+    from http_fetcher import SessionExpiredError
+    from metrics import setup_metrics
+    from scraper import KKTIXScraper
+    from thumbnails import localize_dump
+    logger.info("Loaded the scraper modules in %.0f ms", (time.perf_counter() - started) * 1000)
+    
+    if args.batch:
+        try:
+            return run_batch_mode(args, logger)
+        except (IOError, ValueError) as e:
+            logger.error("Error in batch mode: %s", str(e))
+            return 1
+    
+    metrics = setup_metrics()
+    scraper = None
+    dumps_dir = None
+    if args.resume:
+        dumps_dir = find_resumable_dumps_dir()
+        if dumps_dir:
+            logger.info("Resuming unfinished run in %s", dumps_dir)
+        else:
+            logger.info("No unfinished run found, starting a new one")
+    
+    try:
+        if args.http:
+            scraper, order_count = fetch_orders_over_http(args.incremental, args.refresh, dumps_dir, logger)
+        else:
+            scraper = KKTIXScraper(dumps_dir=dumps_dir)
+            scraper.login()
+            order_count = scraper.get_order_details(incremental=args.incremental, refresh=args.refresh)
         
         # Get the JSON filename that was created
         json_filename = scraper.latest_json_filename
         
+        # Serve thumbnails from the local cache instead of hot-linking the CDN
+        if os.getenv('KKTIX_THUMBNAILS', 'true').lower() == 'true':
+            with metrics.phase("thumbnails"):
+                localize_dump(scraper.dumps_dir, json_filename)
+        
+        # Precompute numeric fields and totals for the dashboard
+        with metrics.phase("normalize"):
+            summary_filename = normalize_dump(scraper.dumps_dir, json_filename)
+        
+        # Keep the cross-run history in SQLite up to date
+        if os.getenv('KKTIX_DB', 'true').lower() == 'true':
+            with metrics.phase("db_upsert"):
+                db = OrderDatabase()
+                try:
+                    db.import_dumps([os.path.join(scraper.dumps_dir, json_filename)])
+                finally:
+                    db.close()
+        
         # Copy and update timeline template
-        timeline_path = copy_and_update_timeline(scraper.dumps_dir, json_filename)
+        with metrics.phase("copy_and_update_timeline"):
+            timeline_path = copy_and_update_timeline(scraper.dumps_dir, json_filename, summary_filename)
         
         # Convert path to file URL
         file_url = f'file://{os.path.abspath(timeline_path)}'
@@ -68,17 +272,136 @@ def main():
         # Open timeline in default browser
         webbrowser.open(file_url)
         
-        logger.info("Successfully processed %d orders", len(orders))
+        logger.info("Successfully processed %d orders", order_count)
         logger.info("Timeline visualization opened at: %s", file_url)
         
         return 0
         
-    except (IOError, WebDriverException, JSONDecodeError) as e:
+    except (IOError, WebDriverException, JSONDecodeError, SessionExpiredError, sqlite3.Error) as e:
         logger.error("Error in main: %s", str(e))
         return 1
     finally:
         if scraper:
             scraper.quit()
+            # Written on failures too, since slow or failing runs are what the report is for
+            metrics.write(scraper.dumps_dir)
+
+def resolve_dump(path=None):
+    """Return (dumps_dir, json_filename) for an orders_*.json file or the newest dump in a directory"""
+    if path and os.path.isfile(path):
+        return os.path.dirname(path) or '.', os.path.basename(path)
+    return find_latest_dump(path)
+
+def export_from_db(args):
+    """Write the orders matching the filters from the SQLite history into DB_RENDER_DIR
+
+    The directory is replaced on every call. Returns (dumps_dir,
+    json_filename, summary_filename, order_count).
+    """
+    db = OrderDatabase()
+    dumps_dir = DB_RENDER_DIR
+    shutil.rmtree(dumps_dir, ignore_errors=True)
+    os.makedirs(dumps_dir)
+    try:
+        json_filename, summary_filename, order_count = db.export(
+            dumps_dir, host=args.host, year=args.year, location=args.location
+        )
+        
+        # Point thumbnails at the shared cache without downloading anything
+        if os.getenv('KKTIX_THUMBNAILS', 'true').lower() == 'true':
+            from thumbnails import localize_dump
+            localize_dump(dumps_dir, json_filename, offline=True)
+    except Exception:
+        # Do not leave a half-written export behind
+        shutil.rmtree(dumps_dir, ignore_errors=True)
+        raise
+    finally:
+        db.close()
+    return dumps_dir, json_filename, summary_filename, order_count
+
+def render(args, logger):
+    """Re-render timeline.html from an existing dump or the SQLite history"""
+    if args.from_db:
+        dumps_dir, json_filename, summary_filename, order_count = export_from_db(args)
+        logger.info("Rendering %d stored orders", order_count)
+    else:
+        dump = resolve_dump(args.dump)
+        if dump is None:
+            logger.error("No orders_*.json dump found to render")
+            return 1
+        dumps_dir, json_filename = dump
+        summary_filename = json_filename.replace('.json', '.summary.json')
+        # Dumps written before normalization existed have no summary yet
+        if not os.path.exists(os.path.join(dumps_dir, summary_filename)):
+            summary_filename = normalize_dump(dumps_dir, json_filename)
+        logger.info("Rendering %s", os.path.join(dumps_dir, json_filename))
+    
+    timeline_path = copy_and_update_timeline(dumps_dir, json_filename, summary_filename)
+    file_url = f'file://{os.path.abspath(timeline_path)}'
+    if not args.no_open:
+        webbrowser.open(file_url)
+    logger.info("Timeline written to: %s", file_url)
+    return 0
+
+def serve(args, logger):
+    """Serve the dashboard and its query API until interrupted"""
+    from timeline_server import TimelineServer
+    
+    if args.from_db:
+        db = OrderDatabase()
+        try:
+            orders = db.query(host=args.host, year=args.year, location=args.location)
+        finally:
+            db.close()
+    else:
+        dump = resolve_dump(args.dump)
+        if dump is None:
+            logger.error("No orders_*.json dump found to serve")
+            return 1
+        dumps_dir, json_filename = dump
+        logger.info("Serving %s", os.path.join(dumps_dir, json_filename))
+        with open(os.path.join(dumps_dir, json_filename), 'r', encoding='utf-8') as f:
+            orders = json.load(f)
+    
+    server = TimelineServer(orders, port=args.port)
+    webbrowser.open(server.url)
+    server.serve_forever()
+    return 0
+
+def import_dumps(args, logger):
+    """Upsert dumps into the SQLite history"""
+    db = OrderDatabase()
+    try:
+        imported = db.import_dumps(args.dumps)
+        logger.info("Imported %d dump(s), %d orders in %s", imported, len(db), db.path)
+    finally:
+        db.close()
+    return 0
+
+def main(argv=None):
+    """Main execution function for KKTIX order processing and visualization."""
+    started = time.perf_counter()
+    args = parse_args(argv)
+    if args.command == 'scrape':
+        from dotenv import load_dotenv
+        load_dotenv()  # Load environment variables from .env file
+    else:
+        load_env_file()
+    logger = setup_logger()
+    
+    try:
+        if args.command == 'scrape':
+            return scrape(args, logger)
+        if args.command == 'render':
+            return render(args, logger)
+        if args.command == 'serve':
+            return serve(args, logger)
+        return import_dumps(args, logger)
+    except (IOError, JSONDecodeError, sqlite3.Error) as e:
+        logger.error("Error in %s: %s", args.command, str(e))
+        return 1
+    finally:
+        logger.info("%s finished in %.2fs", args.command, time.perf_counter() - started)
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Per-phase timing and WebDriver command instrumentation
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from utils import setup_logger
+
+_NULL_PHASE = nullcontext()
+_metrics = None
+
+class _Phase:
+    """Context manager timing one occurrence of a phase."""
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.metrics.stack().append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.metrics.stack().pop()
+        self.metrics.record(self.name, elapsed)
+        return False
+
+class Metrics:
+    """Collect per-phase durations, WebDriver command counts and timeouts for a run.
+
+    When disabled, phase() returns a shared no-op context manager and
+    drivers are left untouched, so instrumented code pays almost nothing.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.time()
+        self.phases = {}
+        self.page_loads = {"count": 0, "bytes": 0, "load_ms": 0.0}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def stack(self):
+        """Phase names entered by the current thread, innermost last"""
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def current_phase(self):
+        stack = self.stack()
+        return stack[-1] if stack else 'other'
+
+    def _bucket(self, name):
+        return self.phases.setdefault(name, {
+            "count": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "webdriver_commands": 0,
+            "timeouts": 0,
+            "retries": 0
+        })
+
+    def phase(self, name):
+        """Context manager timing a phase such as "login" or "detail_page" """
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name, elapsed):
+        with self.lock:
+            bucket = self._bucket(name)
+            bucket["count"] += 1
+            bucket["total_seconds"] += elapsed
+            bucket["max_seconds"] = max(bucket["max_seconds"], elapsed)
+
+    def record_timeout(self):
+        """Count a wait that timed out against the current phase"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._bucket(self.current_phase())["timeouts"] += 1
+
+    def record_retry(self):
+        """Count a request retried by the scheduler against the current phase"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._bucket(self.current_phase())["retries"] += 1
+
+    def record_page_load(self, transferred_bytes, load_ms):
+        """Add one page's transferred bytes and load event end time"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.page_loads["count"] += 1
+            self.page_loads["bytes"] += transferred_bytes
+            self.page_loads["load_ms"] += load_ms
+
+    def instrument_driver(self, driver):
+        """Count every WebDriver command the driver sends against the current phase"""
+        if not self.enabled:
+            return driver
+        execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            with self.lock:
+                self._bucket(self.current_phase())["webdriver_commands"] += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted_execute
+        return driver
+
+    def report(self):
+        """Return the collected metrics as a JSON-serializable dict"""
+        with self.lock:
+            phases = {
+                name: {
+                    **bucket,
+                    "total_seconds": round(bucket["total_seconds"], 4),
+                    "max_seconds": round(bucket["max_seconds"], 4),
+                    "mean_seconds": round(bucket["total_seconds"] / bucket["count"], 4) if bucket["count"] else 0
+                }
+                for name, bucket in self.phases.items()
+            }
+            page_count = self.page_loads["count"]
+            page_loads = {
+                "count": page_count,
+                "bytes": self.page_loads["bytes"],
+                "mean_bytes": round(self.page_loads["bytes"] / page_count) if page_count else 0,
+                "mean_load_ms": round(self.page_loads["load_ms"] / page_count, 1) if page_count else 0
+            }
+        return {
+            "started": datetime.fromtimestamp(self.started).isoformat(),
+            "run_seconds": round(time.time() - self.started, 3),
+            "webdriver_commands": sum(p["webdriver_commands"] for p in phases.values()),
+            "timeouts": sum(p["timeouts"] for p in phases.values()),
+            "retries": sum(p["retries"] for p in phases.values()),
+            "page_loads": page_loads,
+            "phases": phases
+        }
+
+    def write(self, dumps_dir):
+        """Write metrics.json (and metrics.prom when KKTIX_METRICS_PROMETHEUS=true) into dumps_dir"""
+        if not self.enabled:
+            return None
+        logger = setup_logger()
+        report = self.report()
+
+        json_path = os.path.join(dumps_dir, 'metrics.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info("Metrics written to %s", json_path)
+
+        if os.getenv('KKTIX_METRICS_PROMETHEUS', 'false').lower() == 'true':
+            prom_path = os.path.join(dumps_dir, 'metrics.prom')
+            with open(prom_path, 'w', encoding='utf-8') as f:
+                f.write(to_prometheus(report))
+            logger.info("Prometheus metrics written to %s", prom_path)
+        return json_path
+
+def to_prometheus(report):
+    """Render a metrics report in the Prometheus textfile format"""
+    series = [
+        ("kktix_phase_seconds_total", "counter", "Total seconds spent in each phase", "total_seconds"),
+        ("kktix_phase_max_seconds", "gauge", "Longest single occurrence of each phase", "max_seconds"),
+        ("kktix_phase_count", "counter", "Number of times each phase ran", "count"),
+        ("kktix_webdriver_commands_total", "counter", "WebDriver commands sent per phase", "webdriver_commands"),
+        ("kktix_timeouts_total", "counter", "Waits that timed out per phase", "timeouts"),
+        ("kktix_retries_total", "counter", "Requests retried after a transient error per phase", "retries"),
+    ]
+    lines = [
+        "# HELP kktix_run_seconds Wall-clock duration of the run",
+        "# TYPE kktix_run_seconds gauge",
+        f"kktix_run_seconds {report['run_seconds']}",
+        "# HELP kktix_page_loads_total Pages whose transfer size and load time were measured",
+        "# TYPE kktix_page_loads_total counter",
+        f"kktix_page_loads_total {report['page_loads']['count']}",
+        "# HELP kktix_page_bytes_total Bytes transferred by measured pages and their subresources",
+        "# TYPE kktix_page_bytes_total counter",
+        f"kktix_page_bytes_total {report['page_loads']['bytes']}",
+        "# HELP kktix_page_load_mean_ms Mean load event end time of measured pages",
+        "# TYPE kktix_page_load_mean_ms gauge",
+        f"kktix_page_load_mean_ms {report['page_loads']['mean_load_ms']}"
+    ]
+    for metric, metric_type, help_text, key in series:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for name, phase in sorted(report["phases"].items()):
+            lines.append(f'{metric}{{phase="{name}"}} {phase[key]}')
+    return "\n".join(lines) + "\n"
+
+def setup_metrics():
+    """Return the process-wide Metrics instance, enabled by KKTIX_METRICS=true"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics(enabled=os.getenv('KKTIX_METRICS', 'false').lower() == 'true')
+    return _metrics
+
+def reset_metrics():
+    """Start a fresh Metrics instance, for processes that run several scrapes in turn"""
+    global _metrics
+    _metrics = None
+    return setup_metrics()
@@ -0,0 +1,131 @@
+"""
+Normalization of scraped orders into the numbers the timeline dashboard uses
+"""
+
+import json
+import os
+import re
+from datetime import timedelta
+
+from utils import parse_kktix_time, setup_logger, write_orders_json
+
+AMOUNT_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+def parse_amount(value):
+    """Split an Amount value like "NT$1,200" into (amount, currency)
+
+    "Free" and missing amounts are (0, None); unparseable ones are (None, None).
+    """
+    if not value or value == "Free":
+        return 0, None
+    match = AMOUNT_PATTERN.search(value.replace(',', ''))
+    if not match:
+        return None, None
+    amount = float(match.group())
+    currency = value[:value.find(match.group()[0])].strip() or None
+    return (int(amount) if amount.is_integer() else amount), currency
+
+def normalize_order(order_info):
+    """Attach a "normalized" dict to an order and return the fields that failed to parse
+
+    Start and end times are epoch milliseconds, ready for new Date() in the
+    dashboard; the end time is None when the event has no "~" range. An end
+    without a date that falls before the start, as in "22:00 ~ 01:00", is
+    taken to be on the next day.
+    """
+    details = order_info["details"]
+    errors = []
+
+    start = parse_kktix_time(details.get("Start Time"))
+    if start is None:
+        errors.append("Start Time")
+
+    end = None
+    event_time = details.get("Event Time") or ""
+    if start is not None and "~" in event_time:
+        end_text = event_time.split("~", 1)[1]
+        end = parse_kktix_time(end_text, default_date=start)
+        if end is not None and end < start and parse_kktix_time(end_text) is None:
+            end += timedelta(days=1)
+        if end is None or end < start:
+            errors.append("Event Time")
+            end = None
+
+    amount, currency = parse_amount(details.get("Amount"))
+    if amount is None:
+        errors.append("Amount")
+
+    order_info["normalized"] = {
+        "start": int(start.timestamp() * 1000) if start else None,
+        "end": int(end.timestamp() * 1000) if end else None,
+        "amount": amount or 0,
+        "currency": currency,
+        "duration_hours": round((end - start).total_seconds() / 3600, 2) if end else 0,
+        "year": start.year if start else None
+    }
+    return errors
+
+def build_summary(orders):
+    """Distinct filter values and per-year/host/location totals for normalized orders"""
+    totals = {"by_year": {}, "by_host": {}, "by_location": {}}
+    hosts, locations, years = set(), set(), set()
+
+    for order_info in orders:
+        normalized = order_info["normalized"]
+        host = order_info["details"].get("Event Host")
+        location = order_info["details"].get("Event Location")
+        year = normalized["year"]
+
+        for group, key in (("by_year", year), ("by_host", host), ("by_location", location)):
+            if key is None:
+                continue
+            bucket = totals[group].setdefault(str(key), {"count": 0, "amount": 0, "hours": 0})
+            bucket["count"] += 1
+            bucket["amount"] += normalized["amount"]
+            bucket["hours"] = round(bucket["hours"] + normalized["duration_hours"], 2)
+
+        if host:
+            hosts.add(host)
+        if location:
+            locations.add(location)
+        if year is not None:
+            years.add(year)
+
+    return {
+        "hosts": sorted(hosts),
+        "locations": sorted(locations),
+        "years": sorted(years, reverse=True),
+        "totals": totals
+    }
+
+def normalize_dump(dumps_dir, json_filename):
+    """Normalize an orders_*.json dump in place and write its summary next to it
+
+    Returns the summary filename. Orders with fields that could not be
+    parsed are kept and reported in the log.
+    """
+    logger = setup_logger()
+    json_path = os.path.join(dumps_dir, json_filename)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        orders = json.load(f)
+
+    unparsed = 0
+    for order_info in orders:
+        errors = normalize_order(order_info)
+        if errors:
+            unparsed += 1
+            logger.warning(
+                "Could not parse %s for order %s: %s",
+                ", ".join(errors),
+                order_info.get("order_number"),
+                {field: order_info["details"].get(field) for field in errors}
+            )
+
+    write_orders_json(json_path, orders)
+
+    summary_filename = json_filename.replace('.json', '.summary.json')
+    with open(os.path.join(dumps_dir, summary_filename), 'w', encoding='utf-8') as f:
+        json.dump(build_summary(orders), f, ensure_ascii=False, indent=2)
+
+    logger.info("Normalized %d orders (%d with unparsed fields)", len(orders), unparsed)
+    return summary_filename
@@ -0,0 +1,209 @@
+"""
+SQLite order history shared by every run
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from normalize import build_summary, normalize_order
+from utils import setup_logger, write_orders_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_number TEXT PRIMARY KEY,
+    event_title TEXT,
+    host TEXT,
+    location TEXT,
+    state TEXT,
+    start_time INTEGER,
+    end_time INTEGER,
+    year INTEGER,
+    amount NUMERIC NOT NULL DEFAULT 0,
+    currency TEXT,
+    duration_hours NUMERIC NOT NULL DEFAULT 0,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_start_time ON orders (start_time);
+CREATE INDEX IF NOT EXISTS idx_orders_host ON orders (host, start_time);
+CREATE INDEX IF NOT EXISTS idx_orders_location ON orders (location, start_time);
+CREATE INDEX IF NOT EXISTS idx_orders_year ON orders (year, start_time);
+CREATE INDEX IF NOT EXISTS idx_orders_state ON orders (state);
+CREATE INDEX IF NOT EXISTS idx_orders_updated_at ON orders (updated_at);
+"""
+
+# Only rewrite a row (and bump updated_at) when the order actually changed
+UPSERT = """
+INSERT INTO orders (
+    order_number, event_title, host, location, state, start_time, end_time, year,
+    amount, currency, duration_hours, first_seen, updated_at, data
+) VALUES (
+    :order_number, :event_title, :host, :location, :state, :start_time, :end_time, :year,
+    :amount, :currency, :duration_hours, :seen, :seen, :data
+)
+ON CONFLICT (order_number) DO UPDATE SET
+    event_title = excluded.event_title,
+    host = excluded.host,
+    location = excluded.location,
+    state = excluded.state,
+    start_time = excluded.start_time,
+    end_time = excluded.end_time,
+    year = excluded.year,
+    amount = excluded.amount,
+    currency = excluded.currency,
+    duration_hours = excluded.duration_hours,
+    updated_at = excluded.updated_at,
+    data = excluded.data
+WHERE orders.data != excluded.data
+"""
+
+GROUP_COLUMNS = {"year": "year", "host": "host", "location": "location", "state": "state"}
+
+class OrderDatabase:
+    """Orders upserted by order number into SQLite, indexed for dashboard queries.
+
+    The full order JSON is kept in the data column; the columns beside it
+    are copies of the fields that queries filter, sort and group on.
+    """
+    def __init__(self, path=None):
+        self.logger = setup_logger()
+        self.path = path or os.getenv('KKTIX_DB_PATH', 'orders.db')
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def upsert(self, orders):
+        """Insert new orders and update changed ones in one transaction
+
+        Orders without a "normalized" block are normalized first. The scrape
+        timestamp is not stored and thumbnails are stored by their remote
+        URL, so an order only counts as changed when KKTIX changed it.
+        Returns the number of rows inserted or changed.
+        """
+        seen = datetime.now().isoformat(timespec='seconds')
+        rows = []
+        for order_info in orders:
+            if "normalized" not in order_info:
+                normalize_order(order_info)
+            details = order_info["details"]
+            normalized = order_info["normalized"]
+            stored = {key: value for key, value in order_info.items() if key != "timestamp"}
+            if "source_thumbnail_url" in stored:
+                stored["thumbnail_url"] = stored.pop("source_thumbnail_url")
+            rows.append({
+                "order_number": order_info["order_number"],
+                "event_title": order_info.get("event_title"),
+                "host": details.get("Event Host"),
+                "location": details.get("Event Location"),
+                "state": details.get("State"),
+                "start_time": normalized["start"],
+                "end_time": normalized["end"],
+                "year": normalized["year"],
+                "amount": normalized["amount"],
+                "currency": normalized["currency"],
+                "duration_hours": normalized["duration_hours"],
+                "seen": seen,
+                "data": json.dumps(stored, ensure_ascii=False, sort_keys=True)
+            })
+
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(UPSERT, rows)
+            changed = self.connection.total_changes - before
+        self.logger.info("Upserted %d orders into %s (%d new or changed)", len(rows), self.path, changed)
+        return changed
+
+    def import_dumps(self, paths=None):
+        """Upsert orders_*.json dumps, oldest first, and return the number of files imported
+
+        Without paths every dumps_*/orders_*.json in the working directory
+        is imported; normalization summaries are skipped.
+        """
+        if not paths:
+            paths = glob.glob(os.path.join('dumps_*', 'orders_*.json'))
+        paths = sorted(
+            (path for path in paths if not path.endswith('.summary.json')),
+            key=os.path.basename
+        )
+
+        imported = 0
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    orders = json.load(f)
+            except (IOError, ValueError) as e:
+                self.logger.warning("Skipping unreadable dump %s: %s", path, str(e))
+                continue
+            self.logger.info("Importing %d orders from %s", len(orders), path)
+            self.upsert(orders)
+            imported += 1
+        return imported
+
+    def _where(self, host=None, year=None, location=None, state=None, since=None):
+        clauses, params = [], []
+        for column, value in (("host", host), ("year", year), ("location", location), ("state", state)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, host=None, year=None, location=None, state=None, since=None, limit=None):
+        """Return matching orders, newest event first
+
+        since is an ISO timestamp selecting orders added or changed after it.
+        """
+        where, params = self._where(host, year, location, state, since)
+        sql = f"SELECT data FROM orders{where} ORDER BY start_time DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        started = time.perf_counter()
+        orders = [json.loads(data) for (data,) in self.connection.execute(sql, params)]
+        self.logger.debug("Query returned %d orders in %.1fms", len(orders), (time.perf_counter() - started) * 1000)
+        return orders
+
+    def totals(self, group_by, **filters):
+        """Return {key: {"count", "amount", "hours"}} grouped by year, host, location or state"""
+        column = GROUP_COLUMNS[group_by]
+        where, params = self._where(**filters)
+        sql = (
+            f"SELECT {column}, COUNT(*), SUM(amount), ROUND(SUM(duration_hours), 2) "
+            f"FROM orders{where} GROUP BY {column} ORDER BY {column}"
+        )
+        return {
+            str(key): {"count": count, "amount": amount, "hours": hours}
+            for key, count, amount, hours in self.connection.execute(sql, params)
+            if key is not None
+        }
+
+    def export(self, dumps_dir, **filters):
+        """Write the matching orders and their summary into dumps_dir for copy_and_update_timeline
+
+        Returns (json_filename, summary_filename, order_count).
+        """
+        orders = self.query(**filters)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_filename = f"orders_{timestamp}.json"
+        write_orders_json(os.path.join(dumps_dir, json_filename), orders)
+
+        summary_filename = json_filename.replace('.json', '.summary.json')
+        with open(os.path.join(dumps_dir, summary_filename), 'w', encoding='utf-8') as f:
+            json.dump(build_summary(orders), f, ensure_ascii=False, indent=2)
+
+        self.logger.info("Exported %d orders from %s to %s", len(orders), self.path, dumps_dir)
+        return json_filename, summary_filename, len(orders)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,303 @@
+"""
+HTML parsing for KKTIX order pages
+
+Works on a single page_source snapshot (or a file saved by
+dump_page_source()) so a whole listing page costs one WebDriver round trip.
+"""
+
+import logging
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+# Elements rendered on their own line, mirroring WebElement.text
+BLOCK_ELEMENTS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'section', 'table', 'tbody', 'td', 'th', 'thead',
+    'tr', 'ul'
+}
+
+INVISIBLE_ELEMENTS = {'script', 'style', 'template', 'noscript'}
+
+# Path below #registrations_controller holding the event time cell
+EVENT_TIME_PATH = [
+    ('div', 1), ('div', 2), ('div', None), ('div', 1), ('div', None),
+    ('table', None), ('tbody', None), ('tr', 1), ('td', None)
+]
+
+logger = logging.getLogger('kktix_scraper')
+
+class OrderParseError(ValueError):
+    """Raised when an accounting row is missing an expected element."""
+
+class Node:
+    """Minimal DOM element built from html.parser events."""
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or [])
+        self.parent = parent
+        self.children = []
+
+    @property
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    def has_class(self, name):
+        return name in self.classes
+
+    def elements(self):
+        """Direct child elements"""
+        return [child for child in self.children if isinstance(child, Node)]
+
+    def iter(self):
+        """All descendant elements in document order"""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter()
+
+    def find_all(self, tag=None, class_name=None):
+        return [
+            node for node in self.iter()
+            if (tag is None or node.tag == tag)
+            and (class_name is None or node.has_class(class_name))
+        ]
+
+    def find(self, tag=None, class_name=None):
+        return next(iter(self.find_all(tag, class_name)), None)
+
+    def require(self, tag=None, class_name=None):
+        """Like find() but raises OrderParseError, similar to find_element()"""
+        node = self.find(tag, class_name)
+        if node is None:
+            raise OrderParseError(f"Unable to locate element: {tag or ''}.{class_name or ''}")
+        return node
+
+    def has_ancestor_with_class(self, class_name, stop=None):
+        node = self.parent
+        while node is not None and node is not stop:
+            if node.has_class(class_name):
+                return True
+            node = node.parent
+        return False
+
+    def get(self, name):
+        return self.attrs.get(name)
+
+    @property
+    def text(self):
+        """Visible text with whitespace collapsed and block elements on their own lines"""
+        chunks = []
+        self._collect_text(chunks)
+        lines = (re.sub(r'\s+', ' ', line).strip() for line in ''.join(chunks).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+    def _collect_text(self, chunks):
+        for child in self.children:
+            if isinstance(child, Node):
+                if child.tag in INVISIBLE_ELEMENTS:
+                    continue
+                if child.tag in BLOCK_ELEMENTS:
+                    chunks.append('\n')
+                child._collect_text(chunks)
+                if child.tag in BLOCK_ELEMENTS:
+                    chunks.append('\n')
+            else:
+                chunks.append(child.replace('\n', ' '))
+
+class _TreeBuilder(HTMLParser):
+    """Build a Node tree, tolerating unclosed tags."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document')
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, attrs, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Node(tag, attrs, self.current))
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+def parse_html(html):
+    """Parse an HTML document into a Node tree"""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+def _parse_row(row, base_url):
+    """Build an order_info dict from one accounting-row element"""
+    # Extract order number and thumbnail
+    order_number = row.require(class_name='subrow').text.strip('#')
+    thumbnail = _absolute(row.require(class_name='thumb').get('src'), base_url)
+
+    # Extract event details - handle both linked and non-linked titles
+    event_element = next(
+        (node for node in row.find_all('h4', 'subrow')
+         if node.has_ancestor_with_class('event-title', stop=row.parent)),
+        None
+    )
+    if event_element is None:
+        raise OrderParseError("Unable to locate element: .event-title h4.subrow")
+    event_link = event_element.find('a')
+    if event_link is not None:
+        event_title = event_link.text
+        event_url = _absolute(event_link.get('href'), base_url)
+    else:
+        event_title = event_element.text
+        event_url = None
+
+    # Extract all details from dl.item
+    item_dl = row.require(class_name='item')
+    details = {}
+    for dt, dd in zip(item_dl.find_all('dt'), item_dl.find_all('dd')):
+        key = dt.text.strip()
+
+        # Handle different types of values
+        if key == "Amount":
+            price_element = dd.require(class_name='price')
+            if "Free" in price_element.text:
+                value = "Free"
+            else:
+                currency = price_element.require(class_name='currency').text
+                amount = price_element.require(class_name='currency-value').text
+                value = f"{currency}{amount}"
+        elif key == "Receipt":
+            receipt_link = dd.require('a')
+            value = {
+                "number": receipt_link.text.strip(),
+                "url": _absolute(receipt_link.get('href'), base_url)
+            }
+        else:
+            value = dd.text.strip()
+
+        details[key] = value
+
+    # Get action buttons
+    action_buttons = [
+        {
+            "text": button.text.strip(),
+            "url": _absolute(button.get('href'), base_url),
+            "disabled": 'disabled' in button.attrs
+        }
+        for button in row.find_all(class_name='btn')
+        if button.has_ancestor_with_class('col-action', stop=row.parent)
+    ]
+
+    return {
+        "order_number": order_number,
+        "thumbnail_url": thumbnail,
+        "event_title": event_title,
+        "event_url": event_url,
+        "details": details,
+        "actions": action_buttons,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _absolute(url, base_url):
+    """Resolve a relative URL the way get_attribute() does"""
+    if url is None:
+        return None
+    return urljoin(base_url, url)
+
+def parse_order_rows(html, base_url):
+    """Extract order_info dicts from every accounting-row in a listing page
+
+    Rows missing an expected element are logged and skipped, matching the
+    per-element extraction this replaces.
+    """
+    document = html if isinstance(html, Node) else parse_html(html)
+    orders = []
+    for row in document.find_all(class_name='accounting-row'):
+        try:
+            orders.append(_parse_row(row, base_url))
+        except OrderParseError as e:
+            logger.warning("Error extracting order details: %s", str(e))
+    return orders
+
+def find_details_url(order_info):
+    """Return the enabled "Check/Edit Details" URL of an order, or None"""
+    check_details_button = next(
+        (btn for btn in order_info["actions"] if btn["text"] == "Check/Edit Details"),
+        None
+    )
+    if check_details_button and not check_details_button["disabled"]:
+        return check_details_button["url"]
+    return None
+
+def find_next_page(html):
+    """Return the href of the pagination "next" link, or None on the last page"""
+    document = html if isinstance(html, Node) else parse_html(html)
+    for pagination in document.find_all(class_name='pagination'):
+        for link in pagination.find_all('a'):
+            if link.get('rel') == 'next':
+                return link.get('href') or ''
+    return None
+
+def find_last_page(html):
+    """Return the highest page number linked from the pagination, at least 1"""
+    document = html if isinstance(html, Node) else parse_html(html)
+    last_page = 1
+    for pagination in document.find_all(class_name='pagination'):
+        for link in pagination.find_all('a'):
+            text = link.text.strip()
+            if text.isdigit():
+                last_page = max(last_page, int(text))
+            match = re.search(r'[?&]page=(\d+)', link.get('href') or '')
+            if match:
+                last_page = max(last_page, int(match.group(1)))
+    return last_page
+
+def parse_event_time(html):
+    """Extract Event Time and Start Time from a Check/Edit Details page
+
+    Returns None when the registrations_controller time cell is missing.
+    """
+    document = html if isinstance(html, Node) else parse_html(html)
+    controller = next(
+        (node for node in document.iter() if node.get('id') == 'registrations_controller'),
+        None
+    )
+    if controller is None:
+        return None
+
+    nodes = [controller]
+    for tag, index in EVENT_TIME_PATH:
+        matches = []
+        for node in nodes:
+            children = [child for child in node.elements() if child.tag == tag]
+            # Raw HTML often omits the tbody that browsers insert
+            if not children and tag == 'tbody' and node.tag == 'table':
+                children = [node]
+            if index is not None:
+                children = children[index - 1:index]
+            matches.extend(children)
+        nodes = matches
+
+    if not nodes:
+        return None
+
+    # Remove "Add to Calendar" text and keep only the start time (before ~)
+    time_text = nodes[0].text.strip().replace("Add to Calendar", "").strip()
+    start_time = time_text.split("~")[0].strip()
+    return {"Event Time": time_text, "Start Time": start_time}
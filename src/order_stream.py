@@ -0,0 +1,234 @@
+"""
+Append-only JSONL order output with page checkpoints for crash-resume, and
+the per-page scrape loop that feeds it
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+
+from order_parser import find_details_url
+from store import OrderStore
+from utils import setup_logger
+
+STREAM_FILENAME = 'orders_stream.jsonl'
+CHECKPOINT_FILENAME = 'checkpoint.json'
+
+def find_resumable_dumps_dir():
+    """Return the newest dumps_ directory with an unfinished checkpoint, or None"""
+    for dumps_dir in sorted(glob.glob('dumps_*'), reverse=True):
+        checkpoint_path = os.path.join(dumps_dir, CHECKPOINT_FILENAME)
+        if not os.path.exists(checkpoint_path):
+            continue
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            if not json.load(f).get("complete"):
+                return dumps_dir
+    return None
+
+def find_latest_dump(dumps_dir=None):
+    """Return (dumps_dir, json_filename) of the newest orders_*.json dump, or None
+
+    Without dumps_dir every dumps_* directory is searched.
+    """
+    dumps = [
+        path for path in glob.glob(os.path.join(dumps_dir or 'dumps_*', 'orders_*.json'))
+        if not path.endswith('.summary.json')
+    ]
+    if not dumps:
+        return None
+    latest = max(dumps, key=os.path.basename)
+    return os.path.dirname(latest), os.path.basename(latest)
+
+class OrderStreamWriter:
+    """Stream orders to orders_stream.jsonl in dumps_dir, one checkpoint per finished page.
+
+    An unfinished checkpoint already in dumps_dir is resumed: the stream is
+    truncated back to the last finished page and next_page points past it.
+    """
+    def __init__(self, dumps_dir):
+        self.logger = setup_logger()
+        self.dumps_dir = dumps_dir
+        self.stream_path = os.path.join(dumps_dir, STREAM_FILENAME)
+        self.checkpoint_path = os.path.join(dumps_dir, CHECKPOINT_FILENAME)
+        self.checkpoint = {"page": 0, "last_order": None, "orders_written": 0, "offset": 0, "complete": False}
+
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.checkpoint = json.load(f)
+            self.logger.info(
+                "Resuming after page %d (%d orders, last order %s)",
+                self.checkpoint["page"], self.checkpoint["orders_written"], self.checkpoint["last_order"]
+            )
+
+        # Drop any orders written after the last finished page
+        self.stream = open(self.stream_path, 'a+', encoding='utf-8')
+        self.stream.truncate(self.checkpoint["offset"])
+        self.stream.seek(self.checkpoint["offset"])
+
+    @property
+    def next_page(self):
+        return self.checkpoint["page"] + 1
+
+    @property
+    def orders_written(self):
+        return self.checkpoint["orders_written"]
+
+    def write_page(self, page, orders):
+        """Append one page of orders and record it as finished
+
+        Pages must follow the checkpoint without gaps; skipping one would
+        move the checkpoint past it and --resume would never fetch it.
+        """
+        if page != self.next_page:
+            raise ValueError(f"Page {page} does not follow checkpointed page {self.checkpoint['page']}")
+        for order_info in orders:
+            self.stream.write(json.dumps(order_info, ensure_ascii=False))
+            self.stream.write('\n')
+        self.stream.flush()
+        os.fsync(self.stream.fileno())
+
+        self.checkpoint.update({
+            "page": page,
+            "last_order": orders[-1]["order_number"] if orders else self.checkpoint["last_order"],
+            "orders_written": self.checkpoint["orders_written"] + len(orders),
+            "offset": self.stream.tell()
+        })
+        self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """Write the checkpoint atomically"""
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def iter_orders(self):
+        """Yield the streamed orders one at a time"""
+        self.stream.flush()
+        with open(self.stream_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def finalize(self, extra_orders=(), complete=True):
+        """Write orders_<timestamp>.json from the stream plus extra_orders
+
+        Orders are copied line by line so memory use does not depend on the
+        number of orders. The checkpoint is marked complete unless the run
+        stopped early and should stay resumable. Returns (json_filename, order_count).
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_filename = f"orders_{timestamp}.json"
+        json_path = os.path.join(self.dumps_dir, json_filename)
+        self.stream.flush()
+
+        count = 0
+        with open(json_path, 'w', encoding='utf-8') as out, \
+                open(self.stream_path, 'r', encoding='utf-8') as lines:
+            out.write('[\n')
+            for line in lines:
+                if not line.strip():
+                    continue
+                if count:
+                    out.write(',\n')
+                out.write(line.rstrip('\n'))
+                count += 1
+            for order_info in extra_orders:
+                if count:
+                    out.write(',\n')
+                out.write(json.dumps(order_info, ensure_ascii=False))
+                count += 1
+            out.write('\n]\n')
+
+        self.checkpoint["complete"] = complete
+        self.save_checkpoint()
+        self.close()
+        self.logger.info("Orders dumped to JSON: %s", json_path)
+        return json_filename, count
+
+    def close(self):
+        """Close the stream file"""
+        if not self.stream.closed:
+            self.stream.close()
+
+def collect_orders(source, iter_listing_pages, resolve_event_times, incremental=False, refresh=False):
+    """Scrape every listing page into orders_stream.jsonl and write the final JSON dump
+
+    This is the page loop shared by KKTIXScraper and KKTIXHttpFetcher.
+    source provides the detail_cache, scheduler, metrics, logger,
+    dumps_dir and prefetch_pages; iter_listing_pages(prefetch, start_page)
+    yields (page, orders) and resolve_event_times(pending_details) loads
+    the detail pages the DetailCache could not serve. Each page is
+    appended with a checkpoint, so memory use stays flat and a crashed run
+    can resume from the last finished page when dumps_dir is reused.
+
+    In incremental mode the OrderStore is loaded, pagination stops at the
+    first page that only contains orders already in the store, detail
+    pages are skipped for stored orders that already have an Event Time,
+    and the new orders are merged with the stored history before dumping.
+    The store holds the whole history in memory, so other runs neither
+    load nor update it. refresh ignores both the detail cache and the
+    stored event times.
+
+    Sets source.latest_json_filename and returns the number of orders in
+    the final JSON file.
+    """
+    logger = source.logger
+    writer = OrderStreamWriter(source.dumps_dir)
+    source.listing_failed = False
+    store = OrderStore() if incremental else None
+    if incremental:
+        logger.info("Incremental mode: %d orders already in store", len(store))
+
+    try:
+        pages = iter_listing_pages(
+            prefetch=source.prefetch_pages and not incremental,
+            start_page=writer.next_page
+        )
+        for page, page_orders in pages:
+            logger.info("Processing page %d", page)
+            page_order_numbers = [order_info["order_number"] for order_info in page_orders]
+            pending_details = []
+
+            # Rows were already extracted by the listing_parse phase, which times them per page
+            for order_info in page_orders:
+                # Past orders never change, so reuse the stored event time
+                reused = incremental and not refresh and store.apply_stored_event_time(order_info)
+
+                # Detailed time information lives on the Check/Edit Details page
+                details_url = find_details_url(order_info)
+                if details_url and not reused:
+                    pending_details.append((order_info["order_number"], details_url))
+
+            # Resolve detail pages and join the times back by order number
+            event_times = source.detail_cache.resolve(pending_details, resolve_event_times, refresh)
+            for order_info in page_orders:
+                if order_info["order_number"] in event_times:
+                    order_info["details"].update(event_times[order_info["order_number"]])
+                logger.info("Extracted order: %s", order_info["order_number"])
+
+            writer.write_page(page, page_orders)
+
+            if incremental and store.all_known(page_order_numbers):
+                logger.info("Page %d only contains known orders, stopping", page)
+                break
+
+        # Merge into the persistent store so the next incremental run can stop early
+        previous = ()
+        if incremental:
+            previous = store.sync(writer.iter_orders())
+            logger.info("Scraped %d orders, %d in merged history", writer.orders_written, len(store))
+
+        # A listing error leaves the checkpoint open so --resume can continue from it
+        with source.metrics.phase("json_dump"):
+            source.latest_json_filename, order_count = writer.finalize(
+                previous,
+                complete=not source.listing_failed
+            )
+        logger.info("Total orders collected: %d", order_count)
+        return order_count
+    finally:
+        writer.close()
+        # Reported on failures too, so a crashed run still lists what it could not load
+        source.scheduler.report(source.dumps_dir)
@@ -0,0 +1,229 @@
+"""
+Rate limiting, retries, adaptive concurrency and a circuit breaker for KKTIX page loads
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+from metrics import setup_metrics
+from utils import setup_logger
+
+FAILURES_FILENAME = 'failed_requests.json'
+
+def describe(error):
+    """First line of an error message; Selenium appends a stacktrace to its messages"""
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else type(error).__name__
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+class RequestScheduler:
+    """Central gate for every listing and detail page load of a run.
+
+    Each call waits for a concurrency slot and a rate-limit token, and
+    transient errors are retried with jittered exponential backoff. The
+    concurrency limit is halved when a request fails transiently or takes
+    longer than the latency target, and grows by one after a window of fast
+    successes. After KKTIX_BREAKER_THRESHOLD transient failures in a row the
+    circuit opens: calls fail with CircuitOpenError until the cooldown has
+    passed, then a single probe decides whether it closes again. Calls made
+    with wait=True, such as listing pages, sit out the cooldown instead.
+    """
+    def __init__(self, max_concurrency=1, transient=None):
+        self.logger = setup_logger()
+        self.metrics = setup_metrics()
+        self.transient = transient or (lambda error: True)
+
+        self.rate = float(os.getenv('KKTIX_RATE_LIMIT', '10'))
+        self.retries = max(0, int(os.getenv('KKTIX_RETRIES', '3')))
+        self.backoff = float(os.getenv('KKTIX_BACKOFF_SECONDS', '1'))
+        self.backoff_max = float(os.getenv('KKTIX_BACKOFF_MAX_SECONDS', '30'))
+        self.latency_target = float(os.getenv('KKTIX_LATENCY_TARGET', '5'))
+        self.breaker_threshold = max(1, int(os.getenv('KKTIX_BREAKER_THRESHOLD', '5')))
+        self.breaker_cooldown = float(os.getenv('KKTIX_BREAKER_COOLDOWN', '30'))
+
+        self.condition = threading.Condition()
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.fast_successes = 0
+        self.decreased_at = 0.0
+
+        # Token bucket that allows a burst of one request per slot
+        self.token_lock = threading.Lock()
+        self.tokens = float(self.max_concurrency)
+        self.refilled_at = time.monotonic()
+
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+
+        self.requests = 0
+        self.retried = 0
+        self.failures = []
+
+    def call(self, func, retry=None, wait=False):
+        """Run func() through the scheduler and return its result
+
+        Transient errors are retried, calling retry() instead of func() when
+        given (for example to load a page by URL after a click failed). The
+        last error is raised once the retries are used up or the circuit
+        opens; other errors are raised at once. With wait, an open circuit
+        is waited out rather than failing the call.
+        """
+        attempt = 0
+        while True:
+            probe = self.acquire(wait)
+            started = time.monotonic()
+            outcome = "error"
+            try:
+                result = func() if attempt == 0 or retry is None else retry()
+                outcome = "ok"
+            except Exception as e:
+                if self.transient(e):
+                    outcome = "transient"
+                error = e
+            finally:
+                self.release(started, outcome, probe)
+
+            if outcome == "ok":
+                return result
+            if outcome != "transient" or attempt >= self.retries or (self.is_open() and not wait):
+                raise error
+
+            attempt += 1
+            delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (attempt - 1)))
+            with self.condition:
+                self.retried += 1
+            self.metrics.record_retry()
+            self.logger.info(
+                "Retrying in %.1fs (attempt %d of %d) after: %s",
+                delay, attempt + 1, self.retries + 1, describe(error)
+            )
+            time.sleep(delay)
+
+    def acquire(self, wait=False):
+        """Wait for a concurrency slot and a rate-limit token; returns True for a breaker probe
+
+        While the circuit is open this raises CircuitOpenError, or with wait
+        blocks until the cooldown is over and a probe has closed it again.
+        """
+        with self.condition:
+            probe = False
+            logged = False
+            while self.opened_at is not None:
+                remaining = self.breaker_cooldown - (time.monotonic() - self.opened_at)
+                if remaining <= 0 and not self.probing:
+                    # Cooldown is over: let this one request through to test the water
+                    self.probing = probe = True
+                    break
+                if not wait:
+                    raise CircuitOpenError("KKTIX is failing, not sending requests until the circuit closes")
+                if not logged:
+                    self.logger.info("Circuit open, waiting for it to close before the next page")
+                    logged = True
+                # Woken when a request finishes, or once the cooldown is over
+                self.condition.wait(remaining if remaining > 0 else None)
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+            self.requests += 1
+        self.take_token()
+        return probe
+
+    def take_token(self):
+        """Sleep until the rate limit allows another request"""
+        if self.rate <= 0:
+            return
+        with self.token_lock:
+            now = time.monotonic()
+            self.tokens = min(self.max_concurrency, self.tokens + (now - self.refilled_at) * self.rate)
+            self.refilled_at = now
+            # Reserve the token now and sleep off any debt outside the lock
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def release(self, started, outcome, probe):
+        """Free the slot and adapt the concurrency limit and breaker to the outcome"""
+        elapsed = time.monotonic() - started
+        with self.condition:
+            self.in_flight -= 1
+            if outcome == "transient":
+                self.consecutive_failures += 1
+                self.decrease(started, "request failed")
+                if probe or (self.opened_at is None and self.consecutive_failures >= self.breaker_threshold):
+                    self.open_circuit()
+            else:
+                # Any response, even an error page, shows KKTIX is answering
+                self.consecutive_failures = 0
+                if probe:
+                    self.opened_at = None
+                    self.probing = False
+                    self.logger.info("Circuit closed, KKTIX is responding again")
+                if elapsed > self.latency_target:
+                    self.decrease(started, f"request took {elapsed:.1f}s")
+                elif outcome == "ok" and self.limit < self.max_concurrency:
+                    self.fast_successes += 1
+                    if self.fast_successes >= self.limit:
+                        self.limit += 1
+                        self.fast_successes = 0
+                        self.logger.debug("Concurrency raised to %d", self.limit)
+            self.condition.notify_all()
+
+    def decrease(self, started, reason):
+        """Halve the concurrency limit, once per round of requests in flight"""
+        self.fast_successes = 0
+        # Requests started before the last decrease already saw the old limit
+        if started < self.decreased_at or self.limit == 1:
+            return
+        self.limit = max(1, self.limit // 2)
+        self.decreased_at = time.monotonic()
+        self.logger.info("Concurrency lowered to %d (%s)", self.limit, reason)
+
+    def open_circuit(self):
+        self.opened_at = time.monotonic()
+        self.probing = False
+        self.trips += 1
+        self.logger.warning(
+            "Circuit opened after %d failed request(s), pausing requests for %.0fs",
+            self.consecutive_failures, self.breaker_cooldown
+        )
+
+    def is_open(self):
+        with self.condition:
+            return self.opened_at is not None
+
+    def record_failure(self, kind, key, url, error):
+        """Remember a listing or detail page that could not be loaded, for the end-of-run report"""
+        with self.condition:
+            self.failures.append({"kind": kind, "key": key, "url": url, "error": describe(error)})
+
+    def report(self, dumps_dir):
+        """Log request statistics and every request that still failed
+
+        Failures are also written to failed_requests.json in dumps_dir.
+        Returns the number of failed requests.
+        """
+        self.logger.info(
+            "Requests: %d sent, %d retried, circuit opened %d time(s), concurrency %d of %d",
+            self.requests, self.retried, self.trips, self.limit, self.max_concurrency
+        )
+        if not self.failures:
+            return 0
+
+        for kind in sorted({failure["kind"] for failure in self.failures}):
+            keys = [str(failure["key"]) for failure in self.failures if failure["kind"] == kind]
+            self.logger.warning("%d %s request(s) still failed: %s", len(keys), kind, ", ".join(keys))
+
+        path = os.path.join(dumps_dir, FAILURES_FILENAME)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.failures, f, ensure_ascii=False, indent=2)
+        self.logger.warning("Failed requests written to %s", path)
+        return len(self.failures)
@@ -2,26 +2,80 @@
 Scraper for KKTIX orders
 """
 
+import copy
 import json
 import os
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from dotenv import load_dotenv
 
-from utils import setup_logger
+from detail_cache import DetailCache
+from metrics import setup_metrics
+from order_parser import find_last_page, parse_order_rows
+from request_scheduler import CircuitOpenError, RequestScheduler
+from order_stream import collect_orders
+from utils import create_dumps_dir, load_cookies, save_cookies, setup_logger
+
+EVENT_TIME_XPATH = '//*[@id="registrations_controller"]/div[1]/div[2]/div/div[1]/div/table/tbody/tr[1]/td'
+
+# Images, fonts, media and third-party trackers. KKTIX's own scripts and
+# stylesheets are left alone since they build the order and details views.
+BLOCKED_URL_PATTERNS = [
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*',
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    '*.mp4*', '*.webm*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*connect.facebook.net*', '*facebook.com/tr*', '*hotjar.com*',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*'
+]
+
+# Milliseconds from navigation start to the end of the load event; 0 until it has fired
+LOAD_EVENT_END_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+return nav ? nav.loadEventEnd : 0;
+"""
+
+def transferred_bytes(log_entries):
+    """Sum the encodedDataLength of every Network.loadingFinished event in a Chrome performance log"""
+    total = 0
+    for entry in log_entries:
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            total += message["params"]["encodedDataLength"]
+    return total
+
+class PageLoadError(WebDriverException):
+    """Raised when a page did not finish loading: a navigation timeout, a
+    listing page without its order rows or a details page still loading."""
+
+def is_transient_error(error):
+    """Navigation and session failures are worth retrying, a missing element is not
+
+    A details page that finished loading without its time cell looks the
+    same on every attempt, so it fails once and does not count towards the
+    circuit breaker. Pages that did not load raise PageLoadError instead.
+    """
+    return (
+        isinstance(error, WebDriverException)
+        and not isinstance(error, (TimeoutException, NoSuchElementException))
+    )
 
 class KKTIXScraper:
     """A web scraper for extracting order information from KKTIX accounts."""
-    def __init__(self):
+    def __init__(self, dumps_dir=None):
         self.logger = setup_logger()
         load_dotenv()  # Load environment variables
+        self.metrics = setup_metrics()
         
         # Setup Chrome options
         chrome_options = Options()
@@ -48,19 +102,140 @@ class KKTIXScraper:
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.base_url = "https://kktix.com/account/orders"
+        # Skip first-run work and background services that slow down startup
+        chrome_options.add_argument('--no-first-run')
+        chrome_options.add_argument('--no-default-browser-check')
+        chrome_options.add_argument('--disable-extensions')
+        chrome_options.add_argument('--disable-default-apps')
+        chrome_options.add_argument('--disable-background-networking')
+        chrome_options.add_argument('--disable-sync')
+        chrome_options.add_argument('--mute-audio')
+        
+        # Return from get() once the DOM is ready; callers wait for their elements
+        chrome_options.page_load_strategy = 'eager'
+        
+        # Network events for the page load metrics, read back with get_log('performance')
+        if self.metrics.enabled:
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        
+        # Worker browsers share these options but never the profile directory
+        self.chrome_options = chrome_options
+        main_options = chrome_options
+        
+        # A dedicated profile keeps the login across runs without a cookies file
+        self.profile_dir = os.getenv('KKTIX_CHROME_PROFILE')
+        if self.profile_dir:
+            main_options = copy.deepcopy(chrome_options)
+            main_options.add_argument(f'--user-data-dir={os.path.abspath(self.profile_dir)}')
+            self.logger.info("Using Chrome profile at %s", self.profile_dir)
+        
+        # Requests Chrome refuses with net::ERR_BLOCKED_BY_CLIENT; empty when blocking is off
+        self.blocked_urls = []
+        if os.getenv('KKTIX_BLOCK_RESOURCES', 'true').lower() == 'true':
+            patterns = os.getenv('KKTIX_BLOCKED_URLS')
+            self.blocked_urls = (
+                [pattern.strip() for pattern in patterns.split(',') if pattern.strip()]
+                if patterns else BLOCKED_URL_PATTERNS
+            )
+        self.logger.debug("Blocked URL patterns: %s", self.blocked_urls)
+        
+        started = time.perf_counter()
+        with self.metrics.phase("driver_startup"):
+            self.driver = self.metrics.instrument_driver(webdriver.Chrome(options=main_options))
+            self.block_resources(self.driver)
+        self.logger.info("Chrome started in %.2fs", time.perf_counter() - started)
+        
+        self.root_url = os.getenv('KKTIX_BASE_URL', 'https://kktix.com').rstrip('/')
+        self.cookies_file = os.getenv('KKTIX_COOKIES_FILE', 'kktix_cookies.json')
+        self.reuse_session = os.getenv('KKTIX_REUSE_SESSION', 'true').lower() == 'true'
+        self.base_url = f"{self.root_url}/account/orders"
         
-        # Create dumps directory with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.dumps_dir = f"dumps_{timestamp}"
-        if not os.path.exists(self.dumps_dir):
-            os.makedirs(self.dumps_dir)
+        # Number of browsers used to resolve Check/Edit Details pages
+        self.detail_workers = max(1, int(os.getenv('KKTIX_DETAIL_WORKERS', '1')))
+        self.logger.debug("Detail workers: %d", self.detail_workers)
+        self.worker_drivers = []
+        self.worker_pool = None
+        
+        # Load listing pages by URL concurrently instead of clicking "next"; with a
+        # single worker that would only add a browser, so it needs at least two
+        self.prefetch_pages = os.getenv('KKTIX_PREFETCH_PAGES', 'false').lower() == 'true'
+        if self.prefetch_pages and self.detail_workers < 2:
+            self.logger.warning(
+                "KKTIX_PREFETCH_PAGES needs KKTIX_DETAIL_WORKERS of 2 or more, following \"next\" links instead"
+            )
+            self.prefetch_pages = False
+        
+        # Every page load goes through one scheduler for rate limiting, retries and backoff
+        self.scheduler = RequestScheduler(
+            max_concurrency=self.detail_workers,
+            transient=is_transient_error
+        )
+        
+        # Create dumps directory with timestamp unless resuming into an existing one
+        self.dumps_dir = dumps_dir or create_dumps_dir()
         # Add this line
         self.latest_json_filename = None
+        self.detail_cache = DetailCache()
+
+    def block_resources(self, driver):
+        """Have the browser refuse requests matching the blocked URL patterns"""
+        if not self.blocked_urls:
+            return
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+        except WebDriverException as e:
+            self.logger.warning("Could not block resources, loading pages in full: %s", str(e))
+
+    def record_page_load(self, driver):
+        """Add the current page's transferred bytes and load time to the metrics
+
+        Bytes come from the Network.loadingFinished events logged since the
+        last call, so cross-origin responses count in full. The eager page
+        load strategy returns before the load event, so this waits for it.
+        """
+        if not self.metrics.enabled:
+            return
+        try:
+            try:
+                load_ms = WebDriverWait(driver, 10).until(lambda d: d.execute_script(LOAD_EVENT_END_SCRIPT))
+            except TimeoutException:
+                load_ms = None
+            # Drained either way so these events are not counted towards the next page
+            log_entries = driver.get_log('performance')
+        except WebDriverException as e:
+            self.logger.debug("Could not read page load timing: %s", str(e))
+            return
+        if load_ms is None:
+            self.logger.debug("Page did not finish its load event, not recording it")
+            return
+        self.metrics.record_page_load(transferred_bytes(log_entries), load_ms)
+
+    def discard_page_loads(self, driver):
+        """Drop the network events logged so far, such as the login pages'"""
+        if not self.metrics.enabled:
+            return
+        try:
+            driver.get_log('performance')
+        except WebDriverException as e:
+            self.logger.debug("Could not read the performance log: %s", str(e))
 
     def login(self):
-        """Automated login to KKTIX and navigate to orders page"""
+        """Automated login to KKTIX and navigate to orders page
+
+        A saved session (cookies file or Chrome profile) is tried first and
+        the sign-in form is only used when it has expired.
+        """
+        with self.metrics.phase("login"):
+            self.sign_in()
+
+    def sign_in(self):
+        """Restore the saved session or fill in the sign-in form"""
+        started = time.perf_counter()
+        if self.reuse_session and self.restore_session():
+            self.logger.info("Session restored in %.2fs (warm start)", time.perf_counter() - started)
+            return
+        
         try:
             # Get credentials from environment variables
             email = os.getenv('KKTIX_EMAIL')
@@ -70,7 +245,7 @@ class KKTIXScraper:
                 raise ValueError("Missing KKTIX credentials in .env file")
             
             # Navigate to login page
-            self.driver.get("https://kktix.com/users/sign_in")
+            self.driver.get(f"{self.root_url}/users/sign_in")
             self.logger.info("Navigating to login page...")
             
             # Wait for login form
@@ -85,28 +260,103 @@ class KKTIXScraper:
             login_button = self.wait_for_element(By.NAME, "commit")
             login_button.click()
             
+            # Wait for the form submission to leave the sign-in page so the session cookie is set
+            self.wait_until(lambda d: '/users/sign_in' not in d.current_url, timeout=20)
+            
             # Wait for successful login and navigate to orders page
             self.logger.info("Login successful, navigating to orders page...")
+            self.discard_page_loads(self.driver)
             self.driver.get(self.base_url)
             
             # Wait for orders page to load with accounting rows
             self.wait_for_element(By.CLASS_NAME, "accounting-row", timeout=20)
             self.logger.info("Successfully loaded orders page")
+            self.logger.info("Form login completed in %.2fs (cold start)", time.perf_counter() - started)
             
         except Exception as e:
             self.logger.error("Login error: %s", str(e))
             raise
+        
+        if self.reuse_session:
+            self.save_cookies()
+
+    def restore_session(self):
+        """Reuse saved cookies or the Chrome profile, returning True if still logged in"""
+        cookies = load_cookies(self.cookies_file)
+        if cookies is None and not self.profile_dir:
+            return False
+        
+        try:
+            if cookies:
+                # Cookies can only be set on the matching domain; favicon is the cheapest page there
+                self.driver.get(f"{self.root_url}/favicon.ico")
+                for cookie in cookies:
+                    try:
+                        self.driver.add_cookie(cookie)
+                    except WebDriverException as e:
+                        self.logger.debug("Skipping cookie %s: %s", cookie.get('name'), str(e))
+            
+            # One request to the orders page tells whether the session is still valid
+            self.discard_page_loads(self.driver)
+            self.driver.get(self.base_url)
+            if '/users/sign_in' in self.driver.current_url:
+                self.logger.info("Saved session expired, logging in with the form")
+                return False
+            self.wait_until(EC.presence_of_element_located((By.CLASS_NAME, "accounting-row")))
+        except (TimeoutException, WebDriverException) as e:
+            self.logger.info("Could not restore saved session: %s", str(e))
+            return False
+        
+        self.logger.info("Reused saved session, skipping the login form")
+        return True
+
+    def wait_until(self, condition, timeout=10, driver=None):
+        """WebDriverWait(...).until() that counts timeouts against the current metrics phase"""
+        try:
+            return WebDriverWait(driver or self.driver, timeout).until(condition)
+        except TimeoutException:
+            self.metrics.record_timeout()
+            raise
 
-    def wait_for_element(self, by, value, timeout=10):
+    def wait_for_element(self, by, value, timeout=10, driver=None):
         """Helper method to wait for elements"""
         try:
-            return WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((by, value))
-            )
+            return self.wait_until(EC.presence_of_element_located((by, value)), timeout, driver)
         except Exception as e:
             self.logger.error("Timeout waiting for element %s: %s", value, str(e))
             raise
 
+    def wait_for_document_ready(self, timeout=10, driver=None):
+        """Wait until the document and its subresources have finished loading"""
+        self.wait_until(
+            lambda d: d.execute_script("return document.readyState") == "complete",
+            timeout,
+            driver
+        )
+
+    def go_to_next_page(self, next_button, page, timeout=20):
+        """Click a pagination link and wait until the new rows replace the old ones"""
+        started = time.perf_counter()
+        old_row = self.driver.find_element(By.CLASS_NAME, "accounting-row")
+        next_button.click()
+        try:
+            self.wait_until(EC.staleness_of(old_row), timeout)
+        except TimeoutException as e:
+            raise PageLoadError(f"Page {page} did not replace page {page - 1}") from e
+        self.wait_for_listing_rows(page, timeout)
+        self.logger.info("Page %d loaded in %.2fs", page, time.perf_counter() - started)
+
+    def wait_for_listing_rows(self, page, timeout=20, driver=None):
+        """Wait for a listing page's order rows, raising PageLoadError when they do not appear
+
+        Every listing page has rows, so a page without them did not load
+        (an error page or a dropped connection) and is worth retrying.
+        """
+        try:
+            self.wait_for_element(By.CLASS_NAME, "accounting-row", timeout=timeout, driver=driver)
+        except TimeoutException as e:
+            raise PageLoadError(f"Order rows of page {page} did not appear") from e
+
     def capture_order_pages(self):
         """Capture screenshots of all order pages"""
         page = 1
@@ -115,7 +365,7 @@ class KKTIXScraper:
                 # Wait for accounting rows to load
                 self.wait_for_element(By.CLASS_NAME, "accounting-row", timeout=20)
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)  # Wait for any dynamic content
+                self.wait_for_document_ready()
                 
                 # Set window size
                 total_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -127,8 +377,7 @@ class KKTIXScraper:
                     self.logger.info("Reached last page")
                     break
                 
-                next_buttons[0].click()
-                time.sleep(2)
+                self.go_to_next_page(next_buttons[0], page + 1)
                 page += 1
                 
             except (TimeoutException, WebDriverException) as e:
@@ -141,7 +390,7 @@ class KKTIXScraper:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             json_path = os.path.join(self.dumps_dir, f"orders_{timestamp}.json")
             
-            with open(json_path, 'w', encoding='utf-8') as f:
+            with self.metrics.phase("json_dump"), open(json_path, 'w', encoding='utf-8') as f:
                 json.dump(orders, f, ensure_ascii=False, indent=2)
                 
             self.logger.info("Orders dumped to JSON: %s", json_path)
@@ -151,173 +400,353 @@ class KKTIXScraper:
             self.logger.error("Error dumping to JSON: %s", str(e))
             raise
 
-    def get_order_details(self):
-        """Extract order details from all pages"""
-        orders = []
-        page = 1
+    def get_order_details(self, incremental=False, refresh=False):
+        """Extract order details from all pages
+        
+        Listing pages are parsed and their "Check/Edit Details" pages are
+        resolved (serially in a new tab or by a pool of KKTIX_DETAIL_WORKERS
+        browsers) by collect_orders(), which streams them to
+        orders_stream.jsonl with a checkpoint per page.
+        
+        Returns the number of orders in the final JSON file.
+        """
+        try:
+            order_count = collect_orders(self, self.iter_listing_pages, self.resolve_event_times, incremental, refresh)
+        finally:
+            self.close_worker_drivers()
+        self.log_page_loads()
+        return order_count
+
+    def log_page_loads(self):
+        """Log bytes transferred and load time per page, to compare runs with and without blocking"""
+        page_loads = self.metrics.report()["page_loads"] if self.metrics.enabled else None
+        if not page_loads or not page_loads["count"]:
+            return
+        self.logger.info(
+            "Page loads with resource blocking %s: %d pages, %.1f KB transferred per page, loaded after %.0f ms",
+            f"on ({len(self.blocked_urls)} patterns)" if self.blocked_urls else "off",
+            page_loads["count"], page_loads["mean_bytes"] / 1024, page_loads["mean_load_ms"]
+        )
+
+    def iter_listing_pages(self, prefetch=False, start_page=1):
+        """Yield (page, orders) for every listing page from start_page in order
+
+        Pages are followed through the "next" link one at a time, or with
+        prefetch the last page number is read from the pagination and the
+        remaining pages are loaded by URL with the worker browsers. A page
+        that fails to load is retried by URL, waiting out an open circuit;
+        pagination only stops early once the retries are used up.
+        """
+        page = start_page
+        # login() leaves the browser on the first page, later pages are reached by "next"
+        next_button = None
+        reload = page > 1
+        if reload:
+            self.logger.info("Jumping to page %d", page)
         
         while True:
             try:
-                # Wait for accounting rows to load
-                self.wait_for_element(By.CLASS_NAME, "accounting-row", timeout=20)
-                order_elements = self.driver.find_elements(By.CLASS_NAME, "accounting-row")
-                
-                self.logger.info("Processing page %d", page)
-                
-                for order in order_elements:
-                    try:
-                        # Extract order number and thumbnail
-                        order_number = order.find_element(By.CLASS_NAME, "subrow").text.strip('#')
-                        thumbnail = order.find_element(By.CLASS_NAME, "thumb").get_attribute("src")
-                        
-                        # Extract event details - handle both linked and non-linked titles
-                        event_element = order.find_element(By.CSS_SELECTOR, ".event-title h4.subrow")
-                        # Try to find anchor tag first, if not found use h4 text directly
-                        try:
-                            event_link = event_element.find_element(By.TAG_NAME, "a")
-                            event_title = event_link.text
-                            event_url = event_link.get_attribute("href")
-                        except NoSuchElementException:
-                            event_title = event_element.text
-                            event_url = None
-                        
-                        # Extract all details from dl.item
-                        item_dl = order.find_element(By.CLASS_NAME, "item")
-                        details = {}
-                        
-                        # Get all dt/dd pairs
-                        dts = item_dl.find_elements(By.TAG_NAME, "dt")
-                        dds = item_dl.find_elements(By.TAG_NAME, "dd")
-                        
-                        for dt, dd in zip(dts, dds):
-                            key = dt.text.strip()
-                            
-                            # Handle different types of values
-                            if key == "Amount":
-                                price_element = dd.find_element(By.CLASS_NAME, "price")
-                                if "Free" in price_element.text:
-                                    value = "Free"
-                                else:
-                                    currency = price_element.find_element(By.CLASS_NAME, "currency").text
-                                    amount = price_element.find_element(By.CLASS_NAME, "currency-value").text
-                                    value = f"{currency}{amount}"
-                            elif key == "State":
-                                value = dd.text.strip()
-                            elif key == "Receipt":
-                                receipt_link = dd.find_element(By.TAG_NAME, "a")
-                                value = {
-                                    "number": receipt_link.text.strip(),
-                                    "url": receipt_link.get_attribute("href")
-                                }
-                            else:
-                                value = dd.text.strip()
-                            
-                            details[key] = value
-                        
-                        # Get action buttons
-                        action_buttons = []
-                        for button in order.find_elements(By.CSS_SELECTOR, ".col-action .btn"):
-                            action_buttons.append({
-                                "text": button.text.strip(),
-                                "url": button.get_attribute("href"),
-                                "disabled": button.get_attribute("disabled") is not None
-                            })
-                        
-                        # Extract detailed time information from Check/Edit Details page
-                        check_details_button = next(
-                            (btn for btn in action_buttons if btn["text"] == "Check/Edit Details"),
-                            None
-                        )
-                        
-                        if check_details_button and not check_details_button["disabled"]:
-                            try:
-                                # Open new tab
-                                self.driver.execute_script(f"window.open('{check_details_button['url']}', '_blank');")
-                                
-                                # Switch to new tab
-                                self.driver.switch_to.window(self.driver.window_handles[-1])
-                                
-                                # Wait for time information to load using the correct XPath
-                                time_element = self.wait_for_element(
-                                    By.XPATH,
-                                    '//*[@id="registrations_controller"]/div[1]/div[2]/div/div[1]/div/table/tbody/tr[1]/td',
-                                    timeout=10
-                                )
-                                
-                                if time_element:
-                                    # Extract and format time information
-                                    time_text = time_element.text.strip()
-                                    
-                                    # Remove "Add to Calendar" text
-                                    time_text = time_text.replace("Add to Calendar", "").strip()
-                                    
-                                    # Get only the start time (everything before ~)
-                                    start_time = time_text.split("~")[0].strip()
-                                    
-                                    # Store both original and start time
-                                    details["Event Time"] = time_text
-                                    details["Start Time"] = start_time
-                                    
-                                    self.logger.debug("Parsed times - Start: %s", start_time)
-                                
-                                # Close tab and switch back
-                                self.driver.close()
-                                self.driver.switch_to.window(self.driver.window_handles[0])
-                                
-                            except (TimeoutException, WebDriverException, NoSuchElementException) as e:
-                                self.logger.warning("Error extracting detailed time for order %s: %s", order_number, str(e))
-                                # Ensure we switch back to main tab even if there's an error
-                                if len(self.driver.window_handles) > 1:
-                                    self.driver.close()
-                                    self.driver.switch_to.window(self.driver.window_handles[0])
-                        
-                        # Compile order information
-                        order_info = {
-                            "order_number": order_number,
-                            "thumbnail_url": thumbnail,
-                            "event_title": event_title,
-                            "event_url": event_url,
-                            "details": details,
-                            "actions": action_buttons,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        
-                        orders.append(order_info)
-                        self.logger.info("Extracted order: %s", order_number)
-                        
-                    except (NoSuchElementException, TimeoutException, WebDriverException) as e:
-                        self.logger.warning("Error extracting order details: %s", str(e))
-                        continue
-                
+                # One listing_page phase per page, retries included, as in --http mode
+                with self.metrics.phase("listing_page"):
+                    html = self.scheduler.call(
+                        partial(self.read_listing_page, page, next_button, reload),
+                        retry=partial(self.read_listing_page, page, reload=True),
+                        wait=True
+                    )
+                # After the scheduler call, so waiting for the load event is not counted as request latency
+                self.record_page_load(self.driver)
+                with self.metrics.phase("listing_parse"):
+                    page_orders = parse_order_rows(html, self.driver.current_url)
+            except WebDriverException as e:
+                self.logger.error("Browser error on page %d: %s", page, str(e))
+                self.scheduler.record_failure("listing", page, f"{self.base_url}?page={page}", e)
+                self.listing_failed = True
+                return
+            
+            if prefetch and page == start_page:
+                yield page, page_orders
+                yield from self.prefetch_listing_pages(page + 1, find_last_page(html))
+                return
+            
+            yield page, page_orders
+            
+            try:
                 # Check for next page
                 next_buttons = self.driver.find_elements(By.CSS_SELECTOR, ".pagination a[rel='next']")
-                if not next_buttons:
-                    self.logger.info("Reached last page")
-                    break
-                    
-                next_buttons[0].click()
-                time.sleep(2)  # Wait for page load
-                page += 1
-                
-            except (TimeoutException, WebDriverException) as e:
-                self.logger.error("Browser error on page %d: %s", page, str(e))
-                break
+            except WebDriverException as e:
+                self.logger.error("Browser error on page %d: %s", page + 1, str(e))
+                self.scheduler.record_failure("listing", page + 1, f"{self.base_url}?page={page + 1}", e)
+                self.listing_failed = True
+                return
+            if not next_buttons:
+                self.logger.info("Reached last page")
+                return
+            
+            next_button, reload = next_buttons[0], False
+            page += 1
+
+    def read_listing_page(self, page, next_button=None, reload=False, driver=None):
+        """Bring a listing page up in a browser and return its HTML
+
+        The page is reached by clicking next_button in the main browser, or
+        loaded by URL with reload; otherwise the browser is expected to be
+        on it already.
+        """
+        driver = driver or self.driver
+        if next_button is not None:
+            self.go_to_next_page(next_button, page)
+        elif reload:
+            self.load_listing_page(page, driver)
+        # Wait for accounting rows to load
+        self.wait_for_listing_rows(page, driver=driver)
+        return driver.page_source
+
+    def prefetch_listing_pages(self, first_page, last_page):
+        """Load listing pages first_page..last_page concurrently and yield them in order
+
+        Pages are loaded in batches of one page per worker so only a batch
+        of parsed pages is held in memory at a time. Nothing after a page
+        that failed is yielded, so the checkpoint stops before the gap and
+        --resume loads the failed page again.
+        """
+        pages = list(range(first_page, last_page + 1))
+        if not pages:
+            self.logger.info("Reached last page")
+            return
+        
+        self.logger.info("Prefetching pages %d-%d with %d worker(s)", first_page, last_page, self.detail_workers)
+        for start in range(0, len(pages), self.detail_workers):
+            batch = pages[start:start + self.detail_workers]
+            results = self.map_with_worker_drivers(self.fetch_listing_page, batch)
+            if results is None:
+                results = [self.fetch_listing_page(page, self.driver) for page in batch]
+            
+            for page, page_orders in zip(batch, results):
+                if page_orders is None:
+                    return
+                yield page, page_orders
+
+    def fetch_listing_page(self, page, driver):
+        """Load one listing page by URL and parse its orders, or None on error"""
+        started = time.perf_counter()
+        try:
+            with self.metrics.phase("listing_page"):
+                html = self.scheduler.call(
+                    partial(self.read_listing_page, page, reload=True, driver=driver),
+                    wait=True
+                )
+            self.record_page_load(driver)
+            with self.metrics.phase("listing_parse"):
+                page_orders = parse_order_rows(html, driver.current_url)
+        except WebDriverException as e:
+            self.logger.error("Browser error on page %d: %s", page, str(e))
+            self.scheduler.record_failure("listing", page, f"{self.base_url}?page={page}", e)
+            self.listing_failed = True
+            return None
+        self.logger.info("Page %d loaded in %.2fs", page, time.perf_counter() - started)
+        return page_orders
+
+    def load_listing_page(self, page, driver):
+        """Navigate a browser to a listing page by URL and wait for its rows"""
+        try:
+            driver.get(f"{self.base_url}?page={page}")
+        except TimeoutException as e:
+            raise PageLoadError(f"Page {page} timed out while loading") from e
+        self.wait_for_listing_rows(page, driver=driver)
+
+    def start_worker_drivers(self):
+        """Start the worker browser pool on first use and return how many are running"""
+        if self.worker_pool is not None:
+            return len(self.worker_drivers)
         
-        # Create timestamp for the JSON filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.latest_json_filename = f"orders_{timestamp}.json"
+        self.worker_pool = queue.Queue()
+        for _ in range(self.detail_workers):
+            try:
+                driver = self.create_worker_driver()
+            except WebDriverException as e:
+                self.logger.warning("Could not start worker browser: %s", str(e))
+                continue
+            self.worker_drivers.append(driver)
+            self.worker_pool.put(driver)
         
-        # Dump to JSON
-        json_path = os.path.join(self.dumps_dir, self.latest_json_filename)
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(orders, f, ensure_ascii=False, indent=2)
+        if not self.worker_drivers:
+            self.logger.warning("No worker browsers available")
+        return len(self.worker_drivers)
+
+    def close_worker_drivers(self):
+        """Quit every worker browser"""
+        for driver in self.worker_drivers:
+            try:
+                driver.quit()
+            except WebDriverException as e:
+                self.logger.warning("Error closing worker browser: %s", str(e))
+        self.worker_drivers = []
+        self.worker_pool = None
+
+    def map_with_worker_drivers(self, func, items):
+        """Run func(item, driver) over items with the pool of worker browsers
+
+        Results keep the order of items. Returns None when no worker browser
+        could be started so the caller can fall back to the main browser.
+        """
+        workers = self.start_worker_drivers()
+        if not workers:
+            return None
+        
+        def run(item):
+            driver = self.worker_pool.get()
+            try:
+                return func(item, driver)
+            finally:
+                self.worker_pool.put(driver)
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+            return list(executor.map(run, items))
+
+    def resolve_event_times(self, pending_details):
+        """Resolve Check/Edit Details pages into event times keyed by order number"""
+        event_times = {}
+        if not pending_details:
+            return event_times
+        
+        workers = min(self.detail_workers, len(pending_details))
+        self.logger.info("Resolving %d detail pages with %d worker(s)", len(pending_details), workers)
+        
+        if workers <= 1:
+            return self.resolve_event_times_serially(pending_details)
+        
+        results = self.map_with_worker_drivers(
+            lambda item, driver: self.fetch_event_time(*item, driver=driver),
+            pending_details
+        )
+        if results is None:
+            self.logger.warning("Resolving details serially")
+            return self.resolve_event_times_serially(pending_details)
+        
+        return {
+            order_number: result
+            for (order_number, _), result in zip(pending_details, results)
+            if result
+        }
+
+    def resolve_event_times_serially(self, pending_details):
+        """Resolve detail pages one at a time in a tab of the main browser"""
+        event_times = {}
+        for order_number, url in pending_details:
+            result = self.fetch_event_time(order_number, url)
+            if result:
+                event_times[order_number] = result
+        return event_times
+
+    def create_worker_driver(self):
+        """Start an extra browser that shares the main session's cookies"""
+        with self.metrics.phase("driver_startup"):
+            driver = self.metrics.instrument_driver(webdriver.Chrome(options=self.chrome_options))
+            self.block_resources(driver)
+            driver.get(self.root_url)
+            for cookie in self.driver.get_cookies():
+                driver.add_cookie(cookie)
+            self.discard_page_loads(driver)
+        return driver
+
+    def fetch_event_time(self, order_number, url, driver=None):
+        """Extract Event Time and Start Time from a Check/Edit Details page
+
+        Without a driver the page is opened in a new tab of the main browser,
+        otherwise the given worker driver navigates to it directly.
+        """
+        own_tab = driver is None
+        driver = driver or self.driver
+        try:
+            try:
+                with self.metrics.phase("detail_page"):
+                    if own_tab:
+                        self.open_details_tab(driver)
+                    result = self.scheduler.call(partial(self.visit_details_page, url, driver))
+                # After the scheduler call, so waiting for the load event is not counted as request latency
+                self.record_page_load(driver)
+            finally:
+                if own_tab:
+                    self.close_details_tab(driver)
+        except (WebDriverException, CircuitOpenError) as e:
+            self.logger.warning("Error extracting detailed time for order %s: %s", order_number, str(e))
+            self.scheduler.record_failure("detail", order_number, url, e)
+            return None
+        return result
+
+    def open_details_tab(self, driver):
+        """Open a blank tab in the main browser and switch to it"""
+        # Resource blocking is set per tab, so it has to be in place before
+        # the details page starts loading
+        driver.execute_script("window.open('about:blank', '_blank');")
+        driver.switch_to.window(driver.window_handles[-1])
+        self.block_resources(driver)
+
+    def close_details_tab(self, driver):
+        """Close the details tab, if it was opened, and switch back to the main tab"""
+        if len(driver.window_handles) > 1:
+            driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+
+    def visit_details_page(self, url, driver):
+        """Load one Check/Edit Details page and read its time cell, raising browser errors for a retry
+
+        A page that finished loading without the cell raises TimeoutException,
+        which is not retried; a page still loading raises PageLoadError.
+        """
+        try:
+            driver.get(url)
+        except TimeoutException as e:
+            raise PageLoadError(f"Details page timed out while loading: {url}") from e
+        
+        # Wait for time information to load using the correct XPath
+        try:
+            time_element = self.wait_for_element(
+                By.XPATH,
+                EVENT_TIME_XPATH,
+                timeout=10,
+                driver=driver
+            )
+        except TimeoutException as e:
+            if not self.details_page_loaded(driver):
+                raise PageLoadError(f"Details page still loading after 10s: {url}") from e
+            raise
+        
+        result = None
+        if time_element:
+            # Extract and format time information
+            time_text = time_element.text.strip()
+            
+            # Remove "Add to Calendar" text
+            time_text = time_text.replace("Add to Calendar", "").strip()
+            
+            # Get only the start time (everything before ~)
+            start_time = time_text.split("~")[0].strip()
+            
+            # Store both original and start time
+            result = {"Event Time": time_text, "Start Time": start_time}
             
-        self.logger.info("Total orders collected: %d", len(orders))
-        self.logger.info("Orders dumped to JSON: %s", json_path)
-        return orders
+            self.logger.debug("Parsed times - Start: %s", start_time)
+        
+        return result
+
+    def details_page_loaded(self, driver):
+        """True once a details page has finished loading and rendered its registrations view"""
+        return (
+            driver.execute_script("return document.readyState") == "complete"
+            and bool(driver.find_elements(By.ID, "registrations_controller"))
+        )
+
+    def save_cookies(self, path=None):
+        """Save the authenticated session cookies for later runs"""
+        path = path or self.cookies_file
+        save_cookies(self.driver.get_cookies(), path)
+        self.logger.info("Session cookies saved to %s", path)
+        return path
 
     def quit(self):
         """Clean up resources"""
+        self.close_worker_drivers()
         try:
             if self.driver:
                 self.driver.quit()
@@ -0,0 +1,86 @@
+"""
+Persistent order store for KKTIX orders
+"""
+
+import json
+import os
+
+from utils import setup_logger
+
+class OrderStore:
+    """Order history keyed by order number that survives across dumps_ directories."""
+    def __init__(self, path=None):
+        self.logger = setup_logger()
+        self.path = path or os.getenv('KKTIX_STORE_PATH', 'orders_store.json')
+        self.orders = {}
+        self.load()
+
+    def load(self):
+        """Load stored orders from disk, keeping their listing order"""
+        if not os.path.exists(self.path):
+            self.logger.info("No order store found at %s, starting empty", self.path)
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for order in json.load(f):
+                self.orders[order["order_number"]] = order
+
+        self.logger.info("Loaded %d orders from store %s", len(self.orders), self.path)
+
+    def save(self):
+        """Write stored orders to disk atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self.orders.values()), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.logger.info("Saved %d orders to store %s", len(self.orders), self.path)
+
+    def __contains__(self, order_number):
+        return order_number in self.orders
+
+    def __len__(self):
+        return len(self.orders)
+
+    def get(self, order_number):
+        """Return the stored order or None"""
+        return self.orders.get(order_number)
+
+    def all_known(self, order_numbers):
+        """Return True when every order number on a page is already stored"""
+        return bool(order_numbers) and all(number in self.orders for number in order_numbers)
+
+    def apply_stored_event_time(self, order_info):
+        """Copy a stored Event Time into a freshly scraped order.
+
+        Past orders never change, so a stored Event Time means the detail
+        page does not need to be visited again. Returns True when reused.
+        """
+        stored_order = self.orders.get(order_info["order_number"])
+        if not stored_order or "Event Time" not in stored_order["details"]:
+            return False
+        order_info["details"]["Event Time"] = stored_order["details"]["Event Time"]
+        order_info["details"]["Start Time"] = stored_order["details"]["Start Time"]
+        self.logger.debug("Reused stored event time for order %s", order_info["order_number"])
+        return True
+
+    def sync(self, orders):
+        """Merge scraped orders into the store, save it and return the stored orders not seen in this run"""
+        previous = self.merge(orders)
+        self.save()
+        return previous
+
+    def merge(self, orders):
+        """Merge freshly scraped orders into the store.
+
+        orders may be any iterable, such as a stream read back from disk.
+        Scraped orders come first in listing order (newest first), followed
+        by stored orders that were not seen in this run, which are returned.
+        """
+        scraped = {order["order_number"]: order for order in orders}
+        previous = [order for number, order in self.orders.items() if number not in scraped]
+
+        self.orders = scraped
+        for order in previous:
+            self.orders[order["order_number"]] = order
+
+        return previous
@@ -0,0 +1,202 @@
+"""
+Concurrent thumbnail downloads into a content-addressed local cache
+"""
+
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from utils import setup_logger, write_orders_json
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+INDEX_FILENAME = 'index.json'
+
+class ThumbnailCache:
+    """Thumbnail files named by the SHA-256 of their content, shared by every run.
+
+    index.json maps source URLs to cached files so thumbnails that were
+    downloaded by an earlier run are not requested again. With Pillow
+    installed, images wider than max_width are downscaled before caching.
+    An offline cache only serves what the index already holds and never
+    loads requests.
+    """
+    def __init__(self, cache_dir=None, workers=None, max_width=None, offline=False):
+        self.logger = setup_logger()
+        self.cache_dir = cache_dir or os.getenv('KKTIX_THUMBNAIL_CACHE', 'thumbnail_cache')
+        self.workers = workers or max(1, int(os.getenv('KKTIX_THUMBNAIL_WORKERS', '8')))
+        # The event details modal is at most 600px wide
+        self.max_width = int(os.getenv('KKTIX_THUMBNAIL_MAX_WIDTH', '600') if max_width is None else max_width)
+
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILENAME)
+        self.index = {}
+        self.lock = threading.Lock()
+        self.load()
+
+        self.session = None
+        if not offline:
+            # Imported here so re-rendering from the index does not load requests
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers.update({'User-Agent': 'Mozilla/5.0 (kktix-timeline)'})
+
+    def load(self):
+        """Load the URL index, dropping entries whose file has gone missing"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (IOError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable thumbnail index %s: %s", self.index_path, str(e))
+            return
+        self.index = {
+            url: filename for url, filename in index.items()
+            if os.path.exists(os.path.join(self.cache_dir, filename))
+        }
+
+    def save(self):
+        """Write the URL index atomically, keeping entries added by concurrent runs"""
+        with self.lock:
+            index = dict(self.index)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = {**json.load(f), **index}
+            except (IOError, ValueError):
+                pass
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def downscale(self, data):
+        """Shrink an image wider than max_width, returning the original bytes otherwise"""
+        if Image is None or not self.max_width:
+            return data
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                if image.width <= self.max_width:
+                    return data
+                image_format = image.format
+                height = round(image.height * self.max_width / image.width)
+                resized = image.resize((self.max_width, height), Image.LANCZOS)
+                output = io.BytesIO()
+                resized.save(output, format=image_format)
+        except (OSError, ValueError) as e:
+            self.logger.debug("Keeping thumbnail at full size: %s", str(e))
+            return data
+        return output.getvalue() if output.tell() < len(data) else data
+
+    def fetch(self, url):
+        """Download one thumbnail into the cache and return its file name, or None on error
+
+        An offline cache returns None for every URL that is not in the index.
+        """
+        with self.lock:
+            if url in self.index:
+                return self.index[url]
+        if self.session is None:
+            return None
+
+        import requests
+        try:
+            response = self.session.get(url, timeout=20)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self.logger.warning("Could not download thumbnail %s: %s", url, str(e))
+            return None
+
+        data = self.downscale(response.content)
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        if not extension:
+            content_type = response.headers.get('Content-Type', '').split(';')[0]
+            extension = mimetypes.guess_extension(content_type) or ''
+        filename = hashlib.sha256(data).hexdigest() + extension
+
+        # Identical images from different URLs share one file
+        path = os.path.join(self.cache_dir, filename)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self.lock:
+            self.index[url] = filename
+        return filename
+
+    def localize(self, orders, dumps_dir):
+        """Point each order's thumbnail_url at its cached file, relative to dumps_dir
+
+        The remote URL is kept in source_thumbnail_url so the orders can be
+        localized again for another directory. Thumbnails that cannot be
+        downloaded keep their remote URL. Returns the number localized.
+        """
+        urls = {}
+        for order_info in orders:
+            url = order_info.get("source_thumbnail_url") or order_info.get("thumbnail_url")
+            if url and urlparse(url).scheme in ('http', 'https'):
+                urls.setdefault(url, []).append(order_info)
+
+        cached = sum(1 for url in urls if url in self.index)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            filenames = dict(zip(urls, executor.map(self.fetch, urls)))
+        if self.session is not None:
+            self.save()
+
+        relative_dir = os.path.relpath(self.cache_dir, dumps_dir)
+        localized = 0
+        for url, url_orders in urls.items():
+            if filenames[url] is None:
+                continue
+            for order_info in url_orders:
+                order_info["source_thumbnail_url"] = url
+                order_info["thumbnail_url"] = os.path.join(relative_dir, filenames[url]).replace(os.sep, '/')
+                localized += 1
+
+        missing = sum(1 for filename in filenames.values() if filename is None)
+        if self.session is None:
+            self.logger.info("Thumbnails: %d unique, %d cached, %d not cached and left remote", len(urls), cached, missing)
+        else:
+            self.logger.info(
+                "Thumbnails: %d unique, %d already cached, %d downloaded, %d failed",
+                len(urls), cached, len(urls) - cached - missing, missing
+            )
+        return localized
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+def localize_dump(dumps_dir, json_filename, offline=False):
+    """Download the thumbnails of an orders_*.json dump and rewrite it to use the local copies
+
+    With offline, nothing is downloaded: only thumbnails already in the
+    cache index are pointed at their local files.
+    """
+    json_path = os.path.join(dumps_dir, json_filename)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        orders = json.load(f)
+
+    cache = ThumbnailCache(offline=offline)
+    try:
+        cache.localize(orders, dumps_dir)
+    finally:
+        cache.close()
+
+    write_orders_json(json_path, orders)
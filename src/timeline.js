@@ -1,4 +1,12 @@
 let filteredData = [];
+
+// Served by main.py --serve: filtering, sorting and paging happen in the /api/events endpoint
+const serverMode = typeof timelineApi !== "undefined";
+const serverPageSize = 200;
+let serverSummary = null;
+let serverTotal = 0;
+let serverRequest = 0;
+
 const colorScale = d3.scaleOrdinal(d3.schemeSet3);  // Using D3's color scheme
 
 function getEventColor(eventHost) {
@@ -6,17 +14,22 @@ function getEventColor(eventHost) {
 }
 
 function initializeFilters(events) {
+        // Distinct hosts, years and locations are precomputed by normalize.py
+        const summary = typeof timelineSummary !== "undefined" ? timelineSummary : null;
+
         // Get unique hosts
-        const hosts = [...new Set(events.map(event => event.details["Event Host"]))].sort();
+        const hosts = summary ? summary.hosts :
+                [...new Set(events.map(event => event.details["Event Host"]))].sort();
 
-        // Get unique years from Start Time
-        const years = Array.from(new Set(events.map(event => {
-                const date = new Date(event.details["Start Time"].replace(/\//g, "-"));
-                return date.getFullYear();
-        }))).sort((a, b) => b - a);  // Sort years descending
+        // Get unique years from the normalized start time
+        const years = summary ? summary.years :
+                Array.from(new Set(events.map(event => event.normalized.year)))
+                        .filter(year => year !== null)
+                        .sort((a, b) => b - a);  // Sort years descending
 
         // Get unique locations
-        const locations = [...new Set(events.map(event => event.details["Event Location"]))].sort();
+        const locations = summary ? summary.locations :
+                [...new Set(events.map(event => event.details["Event Location"]))].sort();
 
         // Populate host filter dropdown
         const hostSelect = document.getElementById("hostFilter");
@@ -57,6 +70,11 @@ function initializeFilters(events) {
 }
 
 function filterEvents() {
+        if (serverMode) {
+                fetchEvents(0);
+                return;
+        }
+
         const selectedHost = document.getElementById("hostFilter").value;
         const selectedYear = document.getElementById("yearFilter").value;
         const selectedLocation = document.getElementById("locationFilter").value;
@@ -66,17 +84,12 @@ function filterEvents() {
                 const hostMatch = selectedHost === "all" || event.details["Event Host"] === selectedHost;
                 const titleMatch = event.event_title.toLowerCase().includes(searchTerm);
                 const locationMatch = selectedLocation === "all" || event.details["Event Location"] === selectedLocation;  // Year matching
-                const eventDate = new Date(event.details["Start Time"].replace(/\//g, "-"));
-                const yearMatch = selectedYear === "all" || eventDate.getFullYear().toString() === selectedYear;
+                const yearMatch = selectedYear === "all" || String(event.normalized.year) === selectedYear;
                 return hostMatch && titleMatch && yearMatch && locationMatch;
         });
 
         // Sort filtered data before creating timeline
-        filteredData.sort((a, b) => {
-                const aDate = new Date(a.details["Start Time"].replace(/\//g, "-"));
-                const bDate = new Date(b.details["Start Time"].replace(/\//g, "-"));
-                return bDate - aDate;  // Descending order
-        });
+        filteredData.sort((a, b) => b.normalized.start - a.normalized.start);  // Descending order
 
         // Clear and redraw timeline
         createTimeline(filteredData);
@@ -85,10 +98,59 @@ function filterEvents() {
 function resetFilter() {
         document.getElementById("hostFilter").value = "all";
         document.getElementById("searchFilter").value = "";
+        if (serverMode) {
+                fetchEvents(0);
+                return;
+        }
         filteredData = timelineData;
         createTimeline(filteredData);
 }
 
+function eventQuery(offset) {
+        const params = new URLSearchParams({ offset: offset, limit: serverPageSize });
+        const filters = { host: "hostFilter", year: "yearFilter", location: "locationFilter" };
+        Object.entries(filters).forEach(([name, id]) => {
+                const value = document.getElementById(id).value;
+                if (value !== "all") {
+                        params.set(name, value);
+                }
+        });
+        const searchTerm = document.getElementById("searchFilter").value.trim();
+        if (searchTerm) {
+                params.set("q", searchTerm);
+        }
+        return params;
+}
+
+function fetchEvents(offset) {
+        const request = ++serverRequest;
+        fetch(`${timelineApi}/events?${eventQuery(offset)}`)
+                .then(response => response.json())
+                .then(page => {
+                        // Ignore responses to filters that have changed since
+                        if (request !== serverRequest) {
+                                return;
+                        }
+                        serverSummary = page.summary;
+                        serverTotal = page.total;
+                        filteredData = offset === 0 ? page.events : filteredData.concat(page.events);
+                        createTimeline(filteredData);
+                        updateLoadMore();
+                })
+                .catch(error => console.error("Failed to load events", error));
+}
+
+function loadMoreEvents() {
+        fetchEvents(filteredData.length);
+}
+
+function updateLoadMore() {
+        const button = document.getElementById("loadMoreButton");
+        const remaining = serverTotal - filteredData.length;
+        button.style.display = remaining > 0 ? "inline-block" : "none";
+        button.textContent = `載入更多 (${remaining})`;
+}
+
 function showEventDetails(event) {
         const detailsDiv = document.getElementById("event-details");
         const contentDiv = document.getElementById("event-details-content");
@@ -193,35 +255,14 @@ function createLabels(svg, events, y) {
 }
 
 function updateSummary(events) {
-        // Calculate total amount with safety checks
-        const total = events.reduce((sum, event) => {
-                const amountStr = event.details["Amount"] || "0";
-                const amount = parseInt(amountStr.replace(/[^0-9-]/g, "")) || 0;
-                return sum + amount;
-        }, 0);
-
-        // Calculate total learning hours from Event Time
-        const totalHours = events.reduce((sum, event) => {
-                const eventTime = event.details["Event Time"];
-                if (!eventTime) return sum;
-
-                try {
-                        // Check if it"s a time range (contains "~")
-                        if (eventTime.includes("~")) {
-                                const [startStr, endStr] = eventTime.split("~").map(t => t.trim());
-                                const start = new Date(startStr.split("(")[0].trim());
-                                const end = new Date(endStr.split("(")[0].trim());
-                                const diffInHours = (end - start) / (1000 * 60 * 60);
-                                return sum + (isNaN(diffInHours) ? 0 : diffInHours);
-                        } else {
-                                // If no end time, assume 0 hours
-                                return sum;
-                        }
-                } catch (e) {
-                        console.warn("Error parsing event time:", eventTime);
-                        return sum;
-                }
-        }, 0);
+        // The server totals every matching event, not only the pages loaded so far
+        const summary = serverMode ? serverSummary : null;
+
+        // Amounts and durations are precomputed by normalize.py
+        const total = summary ? summary.amount :
+                events.reduce((sum, event) => sum + event.normalized.amount, 0);
+        const totalHours = summary ? summary.hours :
+                events.reduce((sum, event) => sum + event.normalized.duration_hours, 0);
 
         // Update summary stats with safety checks
         const totalAmountElement = document.getElementById("totalAmount");
@@ -232,32 +273,27 @@ function updateSummary(events) {
                 totalAmountElement.textContent = `NT$ ${total.toLocaleString()}`;
         }
         if (totalEventsElement) {
-                totalEventsElement.textContent = events.length;
+                totalEventsElement.textContent = summary ? summary.count : events.length;
         }
         if (totalHoursElement) {
                 totalHoursElement.textContent = `${totalHours.toFixed(1)} 小時`;
         }
 
         // Create charts
-        createExpenseChart(events);
-        createLocationChart(events);
+        createExpenseChart(events, summary && summary.top_expenses);
+        createLocationChart(events, summary && summary.top_locations);
 }
 
-function createExpenseChart(events) {
+function createExpenseChart(events, topExpenses) {
         // Clear existing chart
         d3.select("#expenseChart").html("");
 
         // Process and sort events by amount
-        const sortedEvents = events
-                .map(event => {
-                        // Extract numbers from amount string and handle invalid cases
-                        const amountStr = event.details["Amount"] || "0";
-                        const amount = parseInt(amountStr.replace(/[^0-9-]/g, "")) || 0;
-                        return {
-                                title: event.event_title,
-                                amount: amount
-                        };
-                })
+        const sortedEvents = topExpenses || events
+                .map(event => ({
+                        title: event.event_title,
+                        amount: event.normalized.amount
+                }))
                 .filter(event => event.amount > 0) // Only include positive amounts
                 .sort((a, b) => b.amount - a.amount)
                 .slice(0, 5);
@@ -326,6 +362,9 @@ function createTimeline(events) {
         updateSummary(events);
         d3.select("#timeline").html("");
 
+        // Events without a parseable start time cannot be placed on the axis
+        events = events.filter(d => d.normalized.start !== null);
+
         // Calculate width based on window size
         const containerWidth = Math.min(window.innerWidth * 0.95, 1600);
         const margin = { top: 50, right: 50, bottom: 100, left: 300 };
@@ -350,9 +389,9 @@ function createTimeline(events) {
 
         // Parse both start and end dates
         events.forEach(d => {
-                d.startDate = new Date(d.details["Start Time"].replace(/\//g, "-"));
-                d.endDate = d.details["End Time"] ?
-                        new Date(d.details["End Time"].replace(/\//g, "-")) :
+                d.startDate = new Date(d.normalized.start);
+                d.endDate = d.normalized.end !== null ?
+                        new Date(d.normalized.end) :
                         d.startDate;  // Use start date if no end date
         });
 
@@ -558,19 +597,22 @@ window.addEventListener("resize", () => {
 
 // Initialize the visualization when the page loads
 document.addEventListener("DOMContentLoaded", function () {
-        if (typeof timelineData !== "undefined") {
+        if (serverMode) {
+                initializeFilters([]);
+                fetchEvents(0);
+        } else if (typeof timelineData !== "undefined") {
                 createTimeline(timelineData);
                 initializeFilters(timelineData);
         }
 });
 
 // Add new function for location chart
-function createLocationChart(events) {
+function createLocationChart(events, topLocations) {
         // Clear existing chart
         d3.select("#locationChart").html("");
 
         // Group events by location and count occurrences, excluding "Unknown"
-        const locationCounts = events.reduce((acc, event) => {
+        const locationCounts = topLocations ? {} : events.reduce((acc, event) => {
                 const location = event.details["Event Location"];
                 if (location && location !== "Unknown") {  // Only count if location exists and isn"t "Unknown"
                         acc[location] = (acc[location] || 0) + 1;
@@ -579,7 +621,7 @@ function createLocationChart(events) {
         }, {});
 
         // Convert to array and sort by count
-        const sortedLocations = Object.entries(locationCounts)
+        const sortedLocations = topLocations || Object.entries(locationCounts)
                 .map(([location, count]) => ({ location, count }))
                 .sort((a, b) => b.count - a.count)
                 .slice(0, 5); // Top 5 locations
@@ -0,0 +1,90 @@
+"""
+Compact columnar data payload for the timeline dashboard
+"""
+
+import json
+
+# Order details the dashboard reads, mapped to payload column names
+DETAIL_COLUMNS = {
+    "Start Time": "start_time",
+    "Event Time": "event_time",
+    "Ticket Types": "ticket_types",
+    "Tickets": "tickets",
+    "Amount": "amount_text"
+}
+
+NORMALIZED_COLUMNS = ["start", "end", "amount", "duration_hours", "year"]
+
+class _Dictionary:
+    """Assigns each distinct string a small integer index."""
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def encode(self, value):
+        if value is None:
+            return None
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+def build_payload(orders):
+    """Turn normalized orders into the columnar payload decoded by timeline.html
+
+    Hosts and locations are dictionary-encoded, actions become
+    [text, url, disabled] triples and fields the dashboard never reads
+    (timestamps, event URLs, order state) are dropped.
+    """
+    hosts = _Dictionary()
+    locations = _Dictionary()
+    columns = {
+        name: [] for name in (
+            ["order_number", "event_title", "thumbnail_url", "host", "location", "receipt", "actions"]
+            + list(DETAIL_COLUMNS.values())
+            + NORMALIZED_COLUMNS
+        )
+    }
+
+    count = 0
+    for order_info in orders:
+        details = order_info["details"]
+        columns["order_number"].append(order_info["order_number"])
+        columns["event_title"].append(order_info["event_title"])
+        columns["thumbnail_url"].append(order_info.get("thumbnail_url"))
+        columns["host"].append(hosts.encode(details.get("Event Host")))
+        columns["location"].append(locations.encode(details.get("Event Location")))
+
+        receipt = details.get("Receipt")
+        columns["receipt"].append([receipt["number"], receipt["url"]] if receipt else None)
+        columns["actions"].append([
+            [action["text"], action["url"], 1 if action["disabled"] else 0]
+            for action in order_info.get("actions", [])
+        ])
+
+        for key, name in DETAIL_COLUMNS.items():
+            columns[name].append(details.get(key))
+        for name in NORMALIZED_COLUMNS:
+            columns[name].append(order_info["normalized"][name])
+        count += 1
+
+    return {
+        "version": 1,
+        "count": count,
+        "hosts": hosts.values,
+        "locations": locations.values,
+        "columns": columns
+    }
+
+def write_payload(payload, f):
+    """Stream the payload as compact JSON into an open file and return the bytes written
+
+    "</" is escaped so titles cannot close the surrounding <script> tag.
+    """
+    size = 0
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for chunk in encoder.iterencode(payload):
+        chunk = chunk.replace('</', '<\\/')
+        f.write(chunk)
+        size += len(chunk.encode('utf-8'))
+    return size
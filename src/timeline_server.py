@@ -0,0 +1,292 @@
+"""
+Local timeline server with a query API over in-memory order indexes
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from normalize import build_summary, normalize_order
+from utils import setup_logger
+
+TEMPLATE_DIR = Path(__file__).parent
+STATIC_FILES = {
+    '/timeline.js': 'application/javascript; charset=utf-8',
+    '/styles.css': 'text/css; charset=utf-8'
+}
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+# Fields the dashboard never reads
+DROPPED_FIELDS = ("timestamp", "event_url", "source_thumbnail_url")
+
+class EventIndex:
+    """Orders held in memory with per-host/year/location postings and per-key sort orders.
+
+    Every filter answers from a posting set, every sort from a precomputed
+    permutation, and query results are cached by their canonical query.
+    """
+    SORT_KEYS = {
+        "start": lambda event: event["normalized"]["start"] or 0,
+        "amount": lambda event: event["normalized"]["amount"],
+        "duration": lambda event: event["normalized"]["duration_hours"],
+        "title": lambda event: event["event_title"].lower()
+    }
+
+    def __init__(self, orders, cache_size=256):
+        self.events = []
+        for order_info in orders:
+            if "normalized" not in order_info:
+                normalize_order(order_info)
+            self.events.append({key: value for key, value in order_info.items() if key not in DROPPED_FIELDS})
+
+        self.titles = [event["event_title"].lower() for event in self.events]
+        self.postings = {"host": {}, "year": {}, "location": {}}
+        for position, event in enumerate(self.events):
+            for field, value in (
+                ("host", event["details"].get("Event Host")),
+                ("year", event["normalized"]["year"]),
+                ("location", event["details"].get("Event Location"))
+            ):
+                if value is not None:
+                    self.postings[field].setdefault(str(value), set()).add(position)
+
+        self.orders_by = {
+            key: sorted(range(len(self.events)), key=lambda position, k=key_func: k(self.events[position]))
+            for key, key_func in self.SORT_KEYS.items()
+        }
+        self.summary = build_summary(self.events)
+
+        # The data version makes ETags change whenever the orders do
+        digest = hashlib.sha1()
+        for event in self.events:
+            digest.update(json.dumps(event, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        self.version = digest.hexdigest()[:16]
+
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+    def canonical_query(self, params):
+        """Validate query parameters into a hashable tuple"""
+        sort = params.get("sort", "start")
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key {sort!r}")
+        order = params.get("order", "asc" if sort == "title" else "desc")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown sort order {order!r}")
+        offset = max(0, int(params.get("offset", 0)))
+        limit = min(MAX_LIMIT, max(1, int(params.get("limit", DEFAULT_LIMIT))))
+        return (
+            params.get("host") or None,
+            params.get("year") or None,
+            params.get("location") or None,
+            (params.get("q") or "").strip().lower(),
+            sort, order, offset, limit
+        )
+
+    def etag(self, query):
+        return '"' + hashlib.sha1(f"{self.version}{query!r}".encode('utf-8')).hexdigest()[:20] + '"'
+
+    def matching(self, host, year, location, search):
+        """Positions matching every filter, or None when nothing is filtered"""
+        sets = []
+        for field, value in (("host", host), ("year", year), ("location", location)):
+            if value is not None:
+                sets.append(self.postings[field].get(value, set()))
+        matched = set.intersection(*sorted(sets, key=len)) if sets else None
+
+        if search:
+            candidates = matched if matched is not None else range(len(self.events))
+            matched = {position for position in candidates if search in self.titles[position]}
+        return matched
+
+    def search(self, query):
+        """Return the response body for a canonical query, from the cache when possible"""
+        with self.lock:
+            if query in self.cache:
+                self.cache.move_to_end(query)
+                return self.cache[query]
+
+        host, year, location, search, sort, order, offset, limit = query
+        matched = self.matching(host, year, location, search)
+        positions = self.orders_by[sort] if order == "asc" else reversed(self.orders_by[sort])
+        if matched is not None:
+            positions = [position for position in positions if position in matched]
+        else:
+            positions = list(positions)
+
+        response = json.dumps({
+            "total": len(positions),
+            "offset": offset,
+            "limit": limit,
+            "events": [self.events[position] for position in positions[offset:offset + limit]],
+            "summary": self.totals(positions)
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        with self.lock:
+            self.cache[query] = response
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return response
+
+    def totals(self, positions):
+        """Totals and top-5 charts over every matching event, not just the returned page"""
+        amount = sum(self.events[position]["normalized"]["amount"] for position in positions)
+        hours = sum(self.events[position]["normalized"]["duration_hours"] for position in positions)
+
+        expenses = sorted(
+            (position for position in positions if self.events[position]["normalized"]["amount"] > 0),
+            key=lambda position: self.events[position]["normalized"]["amount"],
+            reverse=True
+        )[:5]
+        locations = {}
+        for position in positions:
+            location = self.events[position]["details"].get("Event Location")
+            if location and location != "Unknown":
+                locations[location] = locations.get(location, 0) + 1
+
+        return {
+            "count": len(positions),
+            "amount": amount,
+            "hours": round(hours, 2),
+            "top_expenses": [
+                {"title": self.events[position]["event_title"], "amount": self.events[position]["normalized"]["amount"]}
+                for position in expenses
+            ],
+            "top_locations": [
+                {"location": location, "count": count}
+                for location, count in sorted(locations.items(), key=lambda item: item[1], reverse=True)[:5]
+            ]
+        }
+
+class TimelineRequestHandler(BaseHTTPRequestHandler):
+    """Serve the dashboard templates, cached thumbnails and the /api endpoints."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        self.server.logger.debug("%s - %s", self.address_string(), format % args)
+
+    def send_body(self, body, content_type, etag=None, status=200):
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            # Revalidate on every use so filter changes cost a 304 instead of a download
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        body = json.dumps({"error": message}).encode('utf-8')
+        self.send_body(body, 'application/json; charset=utf-8', status=status)
+
+    def send_file(self, path, content_type):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.send_error_json(404, "Not found")
+            return
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_body(b'', content_type, etag)
+            return
+        with open(path, 'rb') as f:
+            self.send_body(f.read(), content_type, etag)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        index = self.server.index
+
+        if url.path in ('/', '/timeline.html'):
+            self.send_body(self.server.page, 'text/html; charset=utf-8', f'"{index.version}"')
+        elif url.path in STATIC_FILES:
+            self.send_file(TEMPLATE_DIR / url.path.lstrip('/'), STATIC_FILES[url.path])
+        elif url.path.startswith('/thumbnails/'):
+            name = os.path.basename(url.path)
+            content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            self.send_file(os.path.join(self.server.thumbnail_dir, name), content_type)
+        elif url.path == '/api/summary':
+            body = json.dumps(index.summary, ensure_ascii=False).encode('utf-8')
+            self.send_body(body, 'application/json; charset=utf-8', f'"{index.version}-summary"')
+        elif url.path == '/api/events':
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                query = index.canonical_query(params)
+            except ValueError as e:
+                self.send_error_json(400, str(e))
+                return
+            etag = index.etag(query)
+            # Answer unchanged queries before doing any work
+            if self.headers.get('If-None-Match') == etag:
+                self.send_body(b'', 'application/json; charset=utf-8', etag)
+                return
+            self.send_body(index.search(query), 'application/json; charset=utf-8', etag)
+        else:
+            self.send_error_json(404, "Not found")
+
+class TimelineServer:
+    """Serve a set of orders as the dashboard on a local port."""
+    def __init__(self, orders, host='127.0.0.1', port=8000):
+        self.logger = setup_logger()
+        thumbnail_dir = os.getenv('KKTIX_THUMBNAIL_CACHE', 'thumbnail_cache')
+        cached_thumbnails = {}
+        index_path = os.path.join(thumbnail_dir, 'index.json')
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                cached_thumbnails = json.load(f)
+
+        orders = list(orders)
+        for order_info in orders:
+            # Thumbnails in the local cache are served under /thumbnails/
+            source = order_info.get("source_thumbnail_url") or order_info.get("thumbnail_url")
+            if source in cached_thumbnails:
+                order_info["thumbnail_url"] = f"/thumbnails/{cached_thumbnails[source]}"
+
+        self.httpd = ThreadingHTTPServer((host, port), TimelineRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.logger = self.logger
+        self.httpd.index = EventIndex(orders)
+        self.httpd.thumbnail_dir = thumbnail_dir
+        self.httpd.page = self.render_page()
+        # The unfiltered first page is what every dashboard load asks for
+        self.httpd.index.search(self.httpd.index.canonical_query({}))
+        self.logger.info("Indexed %d orders for the timeline server", len(self.httpd.index.events))
+
+    def render_page(self):
+        """timeline.html with the API location and summary in place of the inlined data"""
+        with open(TEMPLATE_DIR / 'timeline.html', 'r', encoding='utf-8') as f:
+            content = f.read()
+        summary = json.dumps(self.httpd.index.summary, ensure_ascii=False, separators=(',', ':'))
+        injection = (
+            'const timelineApi = "/api";\n'
+            '        const timelineData = [];\n'
+            '        const timelineSummary = ' + summary.replace('</', '<\\/') + ';'
+        )
+        return content.replace("// [TIMELINE_DATA_INJECTION]", injection, 1).encode('utf-8')
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def serve_forever(self):
+        self.logger.info("Timeline server listening on %s", self.url)
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            self.logger.info("Timeline server stopped")
+        finally:
+            self.httpd.server_close()
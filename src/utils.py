@@ -2,20 +2,25 @@
 Utility functions for KKTIX scraper
 """
 
+import json
 import logging
+import re
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 
+# KKTIX times look like "2024/05/18 14:00(+0800)"; the offset is optional
+KKTIX_TIME_PATTERN = re.compile(
+    r'(?:(\d{4})/(\d{1,2})/(\d{1,2})\s*)?(\d{1,2}):(\d{2})(?:\s*\(([+-])(\d{2}):?(\d{2})\))?'
+)
+KKTIX_DEFAULT_TIMEZONE = timezone(timedelta(hours=8))
+
 def setup_logger():
-    """Configure and return a logger with console and file handlers."""
-    # Create logs directory if it doesn't exist
-    logs_dir = "logs"
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
-    
-    # Create logger with timestamp in filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    """Configure and return a logger with console and file handlers.
+
+    Every run on the same day appends to logs/scraper_<date>.log, which is
+    only opened once something is logged.
+    """
     logger = logging.getLogger('kktix_scraper')
     
     # Set log level based on DEBUG environment variable
@@ -33,10 +38,97 @@ def setup_logger():
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
     
-    # File handler with timestamp
-    log_file = os.path.join(logs_dir, f'scraper_{timestamp}.log')
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    # File handler, one file per day
+    logs_dir = "logs"
+    os.makedirs(logs_dir, exist_ok=True)
+    log_file = os.path.join(logs_dir, f'scraper_{datetime.now().strftime("%Y%m%d")}.log')
+    file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
     
     return logger
+
+def load_env_file(path='.env'):
+    """Set KEY=VALUE lines from a .env file that are not already in the environment
+
+    A dependency-free subset of python-dotenv's load_dotenv() for commands
+    that never start a browser: comments, blank lines, "export" prefixes and
+    quoted values are handled, variable expansion is not.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            key = key.strip()
+            if key.startswith('export '):
+                key = key[len('export '):].strip()
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+                value = value[1:-1]
+            elif ' #' in value:
+                value = value.split(' #', 1)[0].rstrip()
+            os.environ.setdefault(key, value)
+
+def write_orders_json(path, orders):
+    """Write orders as a JSON array with one order per line, like the orders stream they come from"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for index, order_info in enumerate(orders):
+            if index:
+                f.write(',\n')
+            f.write(json.dumps(order_info, ensure_ascii=False))
+        f.write('\n]\n')
+
+def create_dumps_dir():
+    """Create and return a dumps directory named after the current time"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    dumps_dir = f"dumps_{timestamp}"
+    if not os.path.exists(dumps_dir):
+        os.makedirs(dumps_dir)
+    return dumps_dir
+
+def save_cookies(cookies, path):
+    """Write browser cookies to a JSON file readable only by the current user"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cookies, f, ensure_ascii=False, indent=2)
+    os.chmod(path, 0o600)
+
+def load_cookies(path):
+    """Load cookies saved by save_cookies(), or None if the file is missing"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def parse_kktix_time(text, default_date=None):
+    """Parse a KKTIX time string into an aware datetime, or None.
+
+    Times without a date (the end of "2024/05/18 14:00 ~ 17:00") take the
+    date from default_date. Times without an offset are taken as Taipei time.
+    """
+    match = KKTIX_TIME_PATTERN.search(text or '')
+    if not match:
+        return None
+    year, month, day, hour, minute, sign, offset_hours, offset_minutes = match.groups()
+
+    if sign:
+        offset = timedelta(hours=int(offset_hours), minutes=int(offset_minutes))
+        tz = timezone(offset if sign == '+' else -offset)
+    else:
+        tz = KKTIX_DEFAULT_TIMEZONE
+
+    try:
+        if year:
+            return datetime(int(year), int(month), int(day), int(hour), int(minute), tzinfo=tz)
+        if default_date is not None:
+            return datetime(
+                default_date.year, default_date.month, default_date.day,
+                int(hour), int(minute), tzinfo=tz
+            )
+    except ValueError:
+        return None
+    return None